@@ -4,14 +4,572 @@ Enhanced with structured output and better clarity.
 """
 import os
 import json
-from typing import Dict, List, Tuple
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import weakref
+from contextlib import closing
+from functools import lru_cache
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
+import httpx
 import pandas as pd
 import numpy as np
 
 load_dotenv()
 
+# Environment is read once at import; a missing key is reported when a generator is created
+_API_KEY = os.getenv("GROQ_API_KEY")
+_DEFAULT_MODEL = os.getenv("GROQ_MODEL_NAME", "mixtral-8x7b-32768")
+
+# Display labels for the standard sum insured options (in rupees)
+SI_LABELS = {
+    1_000_000: "₹10 Lakh",
+    2_500_000: "₹25 Lakh",
+    5_000_000: "₹50 Lakh",
+    10_000_000: "₹1 Crore",
+    20_000_000: "₹2 Crore",
+}
+
+
+def _si_label(value: float) -> str:
+    """Label a sum insured amount, falling back to lakhs for non-standard values"""
+    return SI_LABELS.get(value) or f"₹{value/100000:.0f} Lakh"
+
+
+# Categorical filters mentioned in prompts, in display order: (filter key, label)
+_FILTER_FIELDS = [
+    ('gender', 'Gender'),
+    ('group', 'Group'),
+    ('policy_type', 'Policy Type'),
+    ('smoking_status', 'Smoking Status'),
+]
+
+
+def _build_filter_context(filters: Optional[Dict], fields: List[Tuple[str, str]] = _FILTER_FIELDS,
+                          age_label: Optional[str] = None) -> str:
+    """Comma-joined description of the active filters ("" when none apply)
+    
+    Only the given categorical fields are described, followed by the sum insured
+    and, when age_label is set, a non-default age range.
+    """
+    if not filters:
+        return ""
+    
+    parts = [f"{label}: {filters[key]}" for key, label in fields
+             if filters.get(key) and filters[key] != 'All']
+    if filters.get('sum_insured'):
+        parts.append(f"Sum Insured: {_si_label(filters['sum_insured'])}")
+    if age_label and (filters.get('age_min') or filters.get('age_max')):
+        age_min = filters.get('age_min', 20)
+        age_max = filters.get('age_max', 80)
+        if age_min != 20 or age_max != 80:
+            parts.append(f"{age_label}: {age_min}-{age_max} years")
+    return ", ".join(parts)
+
+
+# Long-lived event loop for async Groq calls (see run_async)
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_loop_lock = threading.Lock()
+
+
+# Single-flight registry for _acached_invoke: (event loop, cache key) -> Future
+_inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+
+def run_async(coro):
+    """Run a coroutine on the shared background event loop and return its result.
+    
+    The async Groq client keeps pooled connections bound to the loop that opened
+    them, so all calls go through one persistent loop rather than a fresh
+    asyncio.run() per Streamlit rerun.
+    """
+    global _async_loop
+    with _async_loop_lock:
+        if _async_loop is None:
+            _async_loop = asyncio.new_event_loop()
+            threading.Thread(target=_async_loop.run_forever, daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _async_loop).result()
+
+
+@lru_cache(maxsize=8)
+def _get_llm(model_name: str, api_key: str) -> ChatGroq:
+    """Shared ChatGroq client per model, so reruns reuse pooled connections"""
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    return ChatGroq(
+        groq_api_key=api_key,
+        model_name=model_name,
+        temperature=0.7,
+        http_client=httpx.Client(limits=limits, timeout=30),
+        http_async_client=httpx.AsyncClient(limits=limits, timeout=30)
+    )
+
+
+def _aggregate_scenarios(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-scenario premium endpoints and averages in a single groupby pass
+    
+    Scenarios keep their order of first appearance; start/end are the first and
+    last rows of each scenario, volatility is the coefficient of variation (%).
+    """
+    agg_spec = {
+        'start': ('average_premium', 'first'),
+        'end': ('average_premium', 'last'),
+        'premium_mean': ('average_premium', 'mean'),
+        'premium_std': ('average_premium', 'std'),
+        'avg_inflation': ('inflation_rate', 'mean'),
+        'avg_interest': ('interest_rate', 'mean'),
+        'avg_gdp': ('gdp_growth', 'mean'),
+        'inflation_start': ('inflation_rate', 'first'),
+        'inflation_end': ('inflation_rate', 'last'),
+        'interest_start': ('interest_rate', 'first'),
+        'interest_end': ('interest_rate', 'last'),
+        'year_min': ('year', 'min'),
+        'year_max': ('year', 'max'),
+    }
+    optional_cols = {'avg_mortality': 'average_mortality_rate',
+                     'avg_life_expectancy': 'average_life_expectancy'}
+    for name, col in optional_cols.items():
+        if col in df.columns:
+            agg_spec[name] = (col, 'mean')
+    
+    stats = df.groupby('scenario', sort=False, observed=True).agg(**agg_spec)
+    for name in optional_cols:
+        if name not in stats.columns:
+            stats[name] = 0.0
+    stats['change_pct'] = ((stats['end'] - stats['start']) / stats['start']) * 100
+    stats['volatility'] = (stats['premium_std'] / stats['premium_mean']) * 100
+    return stats
+
+
+class _FrameKey:
+    """Hashable handle on a DataFrame, compared by a content fingerprint
+    
+    Used as an lru_cache key so sibling insight calls on the same forecast
+    share one aggregation. Content (not id()) is hashed, so a new frame that
+    reuses a freed object's id never hits a stale entry.
+    """
+    __slots__ = ('df', 'fingerprint')
+    
+    def __init__(self, df: pd.DataFrame, fingerprint: Optional[Tuple] = None):
+        self.df = df
+        if fingerprint is None:
+            fingerprint = (
+                tuple(df.columns),
+                df.shape,
+                # Digest of the row hashes in order: a sum would match reordered rows
+                hashlib.blake2b(
+                    pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+                ).hexdigest()
+            )
+        self.fingerprint = fingerprint
+    
+    def __hash__(self):
+        return hash(self.fingerprint)
+    
+    def __eq__(self, other):
+        return isinstance(other, _FrameKey) and self.fingerprint == other.fingerprint
+
+
+# Fingerprints of live frames by id(); an entry is dropped when its frame is collected
+_frame_fingerprints: Dict[int, Tuple[weakref.ref, Tuple]] = {}
+
+
+def _frame_key(df: pd.DataFrame) -> _FrameKey:
+    """_FrameKey for df, hashing each frame object's content only once
+    
+    One forecast feeds several insight calls per rerun (summary, driver analysis,
+    driver impact, recommendations). Frames are not modified once handed to the
+    insights, so the same live object reuses its fingerprint.
+    """
+    frame_id = id(df)
+    entry = _frame_fingerprints.get(frame_id)
+    if entry is not None and entry[0]() is df:
+        return _FrameKey(df, entry[1])
+    key = _FrameKey(df)
+    _frame_fingerprints[frame_id] = (
+        weakref.ref(df, lambda _: _frame_fingerprints.pop(frame_id, None)),
+        key.fingerprint
+    )
+    return key
+
+
+@lru_cache(maxsize=32)
+def _cached_scenario_stats(key: _FrameKey) -> pd.DataFrame:
+    return _aggregate_scenarios(key.df)
+
+
+def _scenario_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Memoized _aggregate_scenarios; the returned frame is shared, treat it as read-only"""
+    return _cached_scenario_stats(_frame_key(df))
+
+
+def _driver_correlations(premium: np.ndarray, drivers: np.ndarray) -> Tuple[float, ...]:
+    """Pearson correlation of premium % change with each driver's first difference
+    
+    premium has shape (n,), drivers (n, k); the first period's changes are 0,
+    matching pct_change()/diff() followed by fillna(0).
+    """
+    # Changes and deviations are computed in place (ufunc out=) and the column sums of
+    # squares contracted with einsum, so no (n, k) temporaries are allocated
+    premium_change = np.zeros_like(premium)
+    np.divide(premium[1:], premium[:-1], out=premium_change[1:])
+    premium_change[1:] -= 1
+    driver_change = np.zeros_like(drivers)
+    np.subtract(drivers[1:], drivers[:-1], out=driver_change[1:])
+    
+    premium_dev = premium_change
+    premium_dev -= premium_change.mean()
+    driver_dev = driver_change
+    driver_dev -= driver_change.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corrs = (premium_dev @ driver_dev) / np.sqrt(
+            (premium_dev @ premium_dev) * np.einsum('ij,ij->j', driver_dev, driver_dev)
+        )
+    return tuple(float(c) for c in corrs)
+
+
+# Premium drivers in the column order _driver_correlations returns them
+_DRIVER_COLS = ['inflation_rate', 'interest_rate', 'gdp_growth']
+
+
+def _driver_impact(forecast_df: pd.DataFrame) -> Dict:
+    """Premium change and per-driver correlation/impact for one forecast"""
+    # Calculate correlation coefficients (all drivers in one pass over raw arrays);
+    # the drivers come out as one row-major (n, 3) block, a missing gdp_growth stays 0
+    n_rows = len(forecast_df)
+    if 'gdp_growth' in forecast_df.columns:
+        drivers = np.ascontiguousarray(forecast_df[_DRIVER_COLS].to_numpy(dtype=np.float64))
+    else:
+        drivers = np.zeros((n_rows, len(_DRIVER_COLS)), dtype=np.float64)
+        drivers[:, :-1] = forecast_df[_DRIVER_COLS[:-1]].to_numpy(dtype=np.float64)
+    premium = forecast_df['average_premium'].to_numpy(dtype=np.float64)
+    if n_rows > 1:
+        inflation_corr, interest_corr, gdp_corr = _driver_correlations(premium, drivers)
+    else:
+        inflation_corr = interest_corr = gdp_corr = 0
+    
+    # Calculate overall impact
+    total_premium_change = float((premium[-1] - premium[0]) / premium[0]) * 100
+    
+    avg_inflation, avg_interest, avg_gdp = (float(v) for v in drivers.mean(axis=0))
+    
+    return {
+        'total_premium_change_pct': total_premium_change,
+        'drivers': {
+            'inflation': {
+                'correlation': inflation_corr,
+                'avg_value': avg_inflation,
+                'impact': 'High' if abs(inflation_corr) > 0.5 else 'Medium' if abs(inflation_corr) > 0.3 else 'Low'
+            },
+            'interest_rate': {
+                'correlation': interest_corr,
+                'avg_value': avg_interest,
+                'impact': 'High' if abs(interest_corr) > 0.5 else 'Medium' if abs(interest_corr) > 0.3 else 'Low'
+            },
+            'gdp_growth': {
+                'correlation': gdp_corr,
+                'avg_value': avg_gdp,
+                'impact': 'High' if abs(gdp_corr) > 0.5 else 'Medium' if abs(gdp_corr) > 0.3 else 'Low'
+            }
+        }
+    }
+
+
+@lru_cache(maxsize=32)
+def _cached_driver_impact(key: _FrameKey) -> Dict:
+    return _driver_impact(key.df)
+
+
+class LLMCache:
+    """On-disk cache of LLM responses keyed by model name + exact prompt text
+    
+    Entries live in a small SQLite file, expire after ttl_seconds and the least
+    recently used ones are evicted beyond max_entries. Storage errors are treated
+    as cache misses so insights never fail because of the cache.
+    """
+    
+    def __init__(self, cache_dir: str = None, ttl_seconds: int = 24 * 3600,
+                 max_entries: int = 512):
+        if cache_dir is None:
+            cache_dir = os.getenv("GROQ_CACHE_DIR") or ".groq_cache"
+        self.path = os.path.join(cache_dir, "responses.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with self._connect() as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, response TEXT, created REAL, accessed REAL)"
+                )
+        except (OSError, sqlite3.Error):
+            self.path = None
+    
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """A fresh connection, closed on leaving the with block
+        
+        (A connection's own with block only commits or rolls back.) Not kept per
+        thread: Streamlit runs each rerun on a new script thread.
+        """
+        return closing(sqlite3.connect(self.path, timeout=5))
+    
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        if self.path is None:
+            return None
+        now = time.time()
+        try:
+            with self._connect() as conn, conn:
+                row = conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                return row[0]
+        except sqlite3.Error:
+            return None
+    
+    def set(self, key: str, response: str):
+        if self.path is None:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, response, now, now)
+                )
+                # Evict least recently used entries beyond the size limit
+                conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN "
+                    "(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error:
+            pass
+
+
+# Structured (JSON mode) response sections: (JSON key, markdown heading, what to put there).
+# A None key is a group heading that is only used when rendering.
+_COMPARISON_SECTIONS = [
+    ('executive_summary', '## EXECUTIVE SUMMARY',
+     '1-2 sentences: overall assessment of premium trends across scenarios'),
+    ('key_findings', '## KEY FINDINGS',
+     'list of 3-4 bullet points highlighting the most important insights'),
+    ('scenario_comparison', '## SCENARIO COMPARISON',
+     'compare each scenario, explaining why premiums differ'),
+    ('risk_assessment', '## RISK ASSESSMENT',
+     'which scenario poses the highest/lowest risk for insurers and policyholders'),
+    ('recommendations', '## RECOMMENDATIONS',
+     'list of actionable recommendations for insurance companies (pricing strategy), '
+     'policyholders (when to buy, what to expect) and planning focus (which scenario to use)'),
+]
+
+_RECOMMENDATION_SECTIONS = [
+    (None, '## FOR INSURANCE COMPANIES', None),
+    ('pricing_strategy', '### Pricing Strategy',
+     'list of 2-3 specific recommendations about pricing adjustments'),
+    ('capital_planning', '### Capital Planning',
+     'recommendations for reserve management and capital allocation'),
+    ('product_development', '### Product Development',
+     'suggestions for new products or modifications'),
+    ('risk_management', '### Risk Management', 'key risks to monitor and mitigate'),
+    (None, '## FOR POLICYHOLDERS', None),
+    ('best_time_to_purchase', '### Best Time to Purchase',
+     'when customers should buy based on the forecasts'),
+    ('what_to_expect', '### What to Expect',
+     'expected premium changes and planning considerations'),
+    ('policy_selection', '### Policy Selection',
+     'recommendations on policy types and terms'),
+    (None, '## STRATEGIC PLANNING', None),
+    ('recommended_scenario', '### Recommended Scenario for Planning',
+     'which scenario to use and why'),
+    ('key_assumptions', '### Key Assumptions to Monitor',
+     'list of economic/mortality factors to watch'),
+    ('action_timeline', '### Action Timeline', 'when to take specific actions'),
+]
+
+# Free-text layout, used when the recommendations are streamed straight to the page
+_RECOMMENDATIONS_MARKDOWN_FORMAT = """Provide structured recommendations in this format:
+
+## FOR INSURANCE COMPANIES
+
+### Pricing Strategy
+[2-3 specific recommendations about pricing adjustments]
+
+### Capital Planning
+[Recommendations for reserve management and capital allocation]
+
+### Product Development
+[Suggestions for new products or modifications]
+
+### Risk Management
+[Key risks to monitor and mitigate]
+
+## FOR POLICYHOLDERS
+
+### Best Time to Purchase
+[When should customers buy based on forecasts]
+
+### What to Expect
+[Expected premium changes and planning considerations]
+
+### Policy Selection
+[Recommendations on policy types and terms]
+
+## STRATEGIC PLANNING
+
+### Recommended Scenario for Planning
+[Which scenario to use and why]
+
+### Key Assumptions to Monitor
+[What economic/mortality factors to watch]
+
+### Action Timeline
+[When to take specific actions]"""
+
+
+def _json_instructions(schema: List[Tuple]) -> str:
+    """Prompt lines asking for a JSON object with the schema's keys"""
+    lines = [f'- "{key}": {description}' for key, _, description in schema if key]
+    return ("Return ONLY a JSON object with the following keys "
+            "(use a list of strings where a list is asked for, otherwise a string):\n"
+            + "\n".join(lines))
+
+
+def _parse_sections(content, schema: List[Tuple]) -> Tuple[str, Optional[Dict]]:
+    """Render a JSON-mode response as markdown using the schema's headings
+    
+    Returns (markdown, parsed sections). Content that is not a JSON object is
+    passed through unchanged with None for the sections.
+    """
+    if isinstance(content, dict):
+        data = content
+    else:
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return content, None
+        if not isinstance(data, dict):
+            return content, None
+    
+    parts = []
+    group_heading = None
+    for key, heading, _ in schema:
+        if key is None:
+            group_heading = heading
+            continue
+        value = data.get(key)
+        if not value:
+            continue
+        if group_heading:
+            # Group headings are only shown above sections that were returned
+            parts.append(group_heading)
+            group_heading = None
+        if isinstance(value, list):
+            body = "\n".join(f"- {item}" for item in value)
+        else:
+            body = str(value)
+        parts.append(f"{heading}\n{body}")
+    return "\n\n".join(parts), data
+
+
+# Prompt templates, filled with str.format by the generators below
+_SUMMARY_TMPL = """You are an expert actuarial analyst and insurance pricing specialist. 
+Analyze the following life insurance premium forecast data and provide a concise, insightful summary.
+
+Forecast Period: {year_min} - {year_max}
+Scenario: {scenario_name}
+Starting Premium: ₹{current_premium:,.2f}
+Ending Premium: ₹{final_premium:,.2f}
+Total Change: {change_pct:.1f}%
+Average Inflation Rate: {avg_inflation:.2f}%
+Average Interest Rate: {avg_interest:.2f}%
+
+Provide a 3-4 sentence summary highlighting:
+1. Key trend in premiums (increasing/decreasing/stable)
+2. Main drivers (economic factors, mortality trends)
+3. What this means for insurers and policyholders
+
+Be concise and professional."""
+
+# %-style: filled once per scenario from a tuple; the rupee amounts are pre-formatted
+# because % formatting has no thousands separator
+_COMPARISON_SCENARIO_TMPL = """
+%s SCENARIO:
+- Starting Premium: ₹%s%s
+- Ending Premium: ₹%s%s
+- Total Change: %+.1f%%
+- Average Inflation: %.2f%%
+- Average Interest Rate: %.2f%%
+- Premium Volatility: %.2f%%
+"""
+
+_COMPARISON_TMPL = """You are an expert actuarial analyst and insurance pricing specialist. 
+
+Analyze these life insurance premium forecast scenarios for India:{filter_context}
+
+{scenario_text}
+
+{format_instructions}
+
+Be specific, use numbers, and make it actionable."""
+
+_DRIVER_TMPL = """You are an expert insurance pricing analyst. Analyze the drivers of life insurance premium changes.{filter_context}
+
+Premium Change Over Period: {premium_change:+.1f}%
+Average Inflation Rate: {avg_inflation:.2f}%
+Average Interest Rate: {avg_interest:.2f}%
+Inflation Change: {inflation_change:+.2f} percentage points
+Interest Rate Change: {interest_change:+.2f} percentage points
+
+Explain:
+1. How inflation affects life insurance premiums
+2. How interest rates affect premiums (both present value and investment income effects)
+3. The combined impact of these economic factors
+4. Other factors that might influence premiums (mortality trends, longevity, smoking status, sum insured)
+
+Be clear and educational (2-3 paragraphs)."""
+
+_RECOMMENDATION_SCENARIO_TMPL = """
+{scenario} SCENARIO:
+- Starting Premium: ₹{start_val:,.2f}
+- 10-Year Forecast: ₹{end_val:,.2f}
+- Change: {change_val:+.1f}%
+- Economic Conditions: Inflation {inf_val:.2f}%, Interest {int_val:.2f}%, GDP {gdp_val:.2f}%
+"""
+
+_RECOMMENDATIONS_TMPL = """You are an expert insurance consultant and actuarial advisor providing strategic recommendations.{filter_context}
+
+PREMIUM FORECAST ANALYSIS:
+{scenario_analysis_text}
+
+KEY METRICS:
+- Average Premium Increase Across Scenarios: {avg_premium_increase:.1f}%
+- Premium Range: ₹{min_premium:,.2f} - ₹{max_premium:,.2f}
+- Spread: ₹{spread:,.2f} ({spread_pct:.1f}%)
+
+{format_instructions}
+
+Be specific, use numbers, prioritize actions, and make it immediately actionable."""
+
+_FULL_REPORT_TMPL = """Complete each of the following {n_tasks} tasks independently.
+
+{task_text}
+
+Respond with a single JSON object with exactly these keys: {keys}.
+Each value must hold the full answer to that task: the JSON object it asks for, or otherwise a string keeping the formatting the task asks for."""
+
 
 class PremiumInsightsGenerator:
     """Generate AI-powered insights about premium forecasts"""
@@ -29,103 +587,143 @@ class PremiumInsightsGenerator:
         - llama-3.1-8b-8192
         - llama-3.3-70b-versatile (if available)
         """
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
+        if not _API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        # Get model name from parameter or environment variable, with fallback
-        if model_name is None:
-            model_name = os.getenv("GROQ_MODEL_NAME", "mixtral-8x7b-32768")
+        self.model_name = model_name or _DEFAULT_MODEL
+        self.llm = _get_llm(self.model_name, _API_KEY)
+        self.cache = LLMCache()
+    
+    def _cached_invoke(self, prompt: str, json_mode: bool = False) -> str:
+        """Invoke the LLM, serving identical prompts from the response cache
+        
+        json_mode asks Groq for a JSON object response (response_format).
+        """
+        key = LLMCache.make_key(self.model_name, prompt)
+        content = self.cache.get(key)
+        if content is None:
+            llm = self.llm.bind(response_format={"type": "json_object"}) if json_mode else self.llm
+            content = llm.invoke(prompt).content
+            self.cache.set(key, content)
+        return content
+    
+    async def _acached_invoke(self, prompt: str, json_mode: bool = False) -> str:
+        """Async variant of _cached_invoke
+        
+        Concurrent misses for the same prompt share one Groq request: later
+        callers await the first caller's in-flight result.
+        """
+        key = LLMCache.make_key(self.model_name, prompt)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+        
+        loop = asyncio.get_running_loop()
+        pending = _inflight.get((loop, key))
+        if pending is not None:
+            # shield: a cancelled follower must not cancel the shared request
+            return await asyncio.shield(pending)
+        
+        future = loop.create_future()
+        _inflight[(loop, key)] = future
+        try:
+            llm = self.llm.bind(response_format={"type": "json_object"}) if json_mode else self.llm
+            content = (await llm.ainvoke(prompt)).content
+            self.cache.set(key, content)
+            future.set_result(content)
+            return content
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved so an unawaited failure is not logged
+            raise
+        finally:
+            del _inflight[(loop, key)]
+    
+    def _prepare_forecast_summary(self, forecast_df: pd.DataFrame,
+                                  scenario_name: str = "base") -> Optional[str]:
+        """Build the forecast summary prompt (None if there is no data)"""
+        stats = _scenario_stats(forecast_df)
+        
+        if scenario_name not in stats.index:
+            return None
         
-        self.llm = ChatGroq(
-            groq_api_key=api_key,
-            model_name=model_name,
-            temperature=0.7
+        scenario_stats = next(stats.loc[[scenario_name]].itertuples())
+        current_premium = scenario_stats.start
+        final_premium = scenario_stats.end
+        change_pct = scenario_stats.change_pct
+        
+        avg_inflation = scenario_stats.avg_inflation
+        avg_interest = scenario_stats.avg_interest
+        
+        prompt = _SUMMARY_TMPL.format(
+            year_min=scenario_stats.year_min,
+            year_max=scenario_stats.year_max,
+            scenario_name=scenario_name,
+            current_premium=current_premium,
+            final_premium=final_premium,
+            change_pct=change_pct,
+            avg_inflation=avg_inflation,
+            avg_interest=avg_interest
         )
+        return prompt
     
     def generate_forecast_summary(self, forecast_df: pd.DataFrame, 
                                  scenario_name: str = "base") -> str:
         """Generate a summary of the forecast"""
-        scenario_data = forecast_df[forecast_df['scenario'] == scenario_name]
-        
-        if scenario_data.empty:
+        prompt = self._prepare_forecast_summary(forecast_df, scenario_name)
+        if prompt is None:
             return "No forecast data available for analysis."
         
-        current_premium = scenario_data.iloc[0]['average_premium']
-        final_premium = scenario_data.iloc[-1]['average_premium']
-        change_pct = ((final_premium - current_premium) / current_premium) * 100
-        
-        avg_inflation = scenario_data['inflation_rate'].mean()
-        avg_interest = scenario_data['interest_rate'].mean()
+        try:
+            return self._cached_invoke(prompt)
+        except Exception as e:
+            return f"Error generating insights: {str(e)}"
+    
+    async def agenerate_forecast_summary(self, forecast_df: pd.DataFrame,
+                                         scenario_name: str = "base") -> str:
+        """Async variant of generate_forecast_summary"""
+        prompt = self._prepare_forecast_summary(forecast_df, scenario_name)
+        if prompt is None:
+            return "No forecast data available for analysis."
         
-        prompt = f"""You are an expert actuarial analyst and insurance pricing specialist. 
-Analyze the following life insurance premium forecast data and provide a concise, insightful summary.
-
-Forecast Period: {scenario_data['year'].min()} - {scenario_data['year'].max()}
-Scenario: {scenario_name}
-Starting Premium: ₹{current_premium:,.2f}
-Ending Premium: ₹{final_premium:,.2f}
-Total Change: {change_pct:.1f}%
-Average Inflation Rate: {avg_inflation:.2f}%
-Average Interest Rate: {avg_interest:.2f}%
-
-Provide a 3-4 sentence summary highlighting:
-1. Key trend in premiums (increasing/decreasing/stable)
-2. Main drivers (economic factors, mortality trends)
-3. What this means for insurers and policyholders
-
-Be concise and professional."""
-
         try:
-            response = self.llm.invoke(prompt)
-            return response.content
+            return await self._acached_invoke(prompt)
         except Exception as e:
             return f"Error generating insights: {str(e)}"
     
-    def generate_scenario_comparison(self, comparison_df: pd.DataFrame, filters: Dict = None) -> Dict:
-        """Generate structured comparison between scenarios with metrics"""
-        scenarios = comparison_df['scenario'].unique()
+    def _prepare_scenario_comparison(self, comparison_df: pd.DataFrame,
+                                     filters: Dict = None) -> Tuple[str, Dict]:
+        """Build the scenario comparison prompt and its metrics (without the AI analysis)"""
+        stats = _scenario_stats(comparison_df)
         
         scenario_summaries = []
         scenario_details = {}
         
-        for scenario in scenarios:
-            scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-            start_premium = scenario_data.iloc[0]['average_premium']
-            end_premium = scenario_data.iloc[-1]['average_premium']
-            change = ((end_premium - start_premium) / start_premium) * 100
-            
-            # Calculate additional metrics
-            avg_inflation = scenario_data['inflation_rate'].mean()
-            avg_interest = scenario_data['interest_rate'].mean()
-            avg_gdp = scenario_data['gdp_growth'].mean()
-            avg_mortality = scenario_data.get('average_mortality_rate', pd.Series([0])).mean()
-            avg_life_exp = scenario_data.get('average_life_expectancy', pd.Series([0])).mean()
-            
-            # Calculate volatility (coefficient of variation)
-            premium_volatility = (scenario_data['average_premium'].std() / 
-                                 scenario_data['average_premium'].mean()) * 100
-            
+        for row in stats.itertuples():
+            scenario = row.Index
             scenario_summaries.append({
                 'scenario': scenario,
-                'start': start_premium,
-                'end': end_premium,
-                'change': change,
-                'avg_inflation': avg_inflation,
-                'avg_interest': avg_interest,
-                'volatility': premium_volatility
+                'start': row.start,
+                'end': row.end,
+                'change': row.change_pct,
+                'avg_inflation': row.avg_inflation,
+                'avg_interest': row.avg_interest,
+                'volatility': row.volatility
             })
             
             scenario_details[scenario] = {
-                'start_premium': start_premium,
-                'end_premium': end_premium,
-                'change_pct': change,
-                'avg_inflation': avg_inflation,
-                'avg_interest': avg_interest,
-                'avg_gdp': avg_gdp,
-                'avg_mortality': avg_mortality,
-                'avg_life_expectancy': avg_life_exp,
-                'volatility': premium_volatility
+                'start_premium': row.start,
+                'end_premium': row.end,
+                'change_pct': row.change_pct,
+                'avg_inflation': row.avg_inflation,
+                'avg_interest': row.avg_interest,
+                'avg_gdp': row.avg_gdp,
+                'avg_mortality': row.avg_mortality,
+                'avg_life_expectancy': row.avg_life_expectancy,
+                'volatility': row.volatility
             }
         
         # Find best and worst scenarios
@@ -134,202 +732,142 @@ Be concise and professional."""
         
         # Build filter context for AI
         filter_context = ""
-        if filters:
-            filter_parts = []
-            if filters.get('gender') and filters['gender'] != 'All':
-                filter_parts.append(f"Gender: {filters['gender']}")
-            if filters.get('group') and filters['group'] != 'All':
-                filter_parts.append(f"Group: {filters['group']}")
-            if filters.get('policy_type') and filters['policy_type'] != 'All':
-                filter_parts.append(f"Policy Type: {filters['policy_type']}")
-            if filters.get('smoking_status') and filters['smoking_status'] != 'All':
-                filter_parts.append(f"Smoking Status: {filters['smoking_status']}")
-            if filters.get('sum_insured'):
-                si_value = filters['sum_insured']
-                if si_value == 1000000:
-                    si_label = "₹10 Lakh"
-                elif si_value == 2500000:
-                    si_label = "₹25 Lakh"
-                elif si_value == 5000000:
-                    si_label = "₹50 Lakh"
-                elif si_value == 10000000:
-                    si_label = "₹1 Crore"
-                elif si_value == 20000000:
-                    si_label = "₹2 Crore"
-                else:
-                    si_label = f"₹{si_value/100000:.0f} Lakh"
-                filter_parts.append(f"Sum Insured: {si_label}")
-            if filters.get('age_min') or filters.get('age_max'):
-                age_min = filters.get('age_min', 20)
-                age_max = filters.get('age_max', 80)
-                if age_min != 20 or age_max != 80:
-                    filter_parts.append(f"Age Range: {age_min}-{age_max} years")
-            
-            if filter_parts:
-                filter_context = f"\n\nFILTER CONTEXT:\nThe analysis is filtered for: {', '.join(filter_parts)}.\n"
+        filter_text = _build_filter_context(filters, age_label="Age Range")
+        if filter_text:
+            filter_context = f"\n\nFILTER CONTEXT:\nThe analysis is filtered for: {filter_text}.\n"
         
         # Get sum insured info from comparison_df if available
         sum_insured_info = ""
-        if 'average_sum_insured' in comparison_df.columns and comparison_df['average_sum_insured'].mean() > 0:
-            avg_si = comparison_df['average_sum_insured'].mean()
-            if avg_si == 1000000:
-                sum_insured_info = " (for ₹10 Lakh coverage)"
-            elif avg_si == 2500000:
-                sum_insured_info = " (for ₹25 Lakh coverage)"
-            elif avg_si == 5000000:
-                sum_insured_info = " (for ₹50 Lakh coverage)"
-            elif avg_si == 10000000:
-                sum_insured_info = " (for ₹1 Crore coverage)"
-            elif avg_si == 20000000:
-                sum_insured_info = " (for ₹2 Crore coverage)"
-            else:
-                sum_insured_info = f" (for ₹{avg_si/100000:.0f} Lakh coverage)"
+        avg_si = comparison_df['average_sum_insured'].mean() if 'average_sum_insured' in comparison_df.columns else 0
+        if avg_si > 0:
+            sum_insured_info = f" (for {_si_label(avg_si)} coverage)"
         
         # Generate AI analysis
-        scenario_text = "\n".join([f"""
-{s['scenario'].upper()} SCENARIO:
-- Starting Premium: ₹{s['start']:,.2f}{sum_insured_info}
-- Ending Premium: ₹{s['end']:,.2f}{sum_insured_info}
-- Total Change: {s['change']:+.1f}%
-- Average Inflation: {s['avg_inflation']:.2f}%
-- Average Interest Rate: {s['avg_interest']:.2f}%
-- Premium Volatility: {s['volatility']:.2f}%
-""" for s in scenario_summaries])
-        
-        prompt = f"""You are an expert actuarial analyst and insurance pricing specialist. 
-
-Analyze these life insurance premium forecast scenarios for India:{filter_context}
-
-{scenario_text}
-
-Provide a structured analysis in the following format (use clear sections):
-
-## EXECUTIVE SUMMARY
-[1-2 sentences: Overall assessment of premium trends across scenarios]
-
-## KEY FINDINGS
-[3-4 bullet points highlighting most important insights]
-
-## SCENARIO COMPARISON
-[Compare each scenario, explaining why premiums differ]
-
-## RISK ASSESSMENT
-[Identify which scenario poses highest/lowest risk for insurers and policyholders]
-
-## RECOMMENDATIONS
-[Actionable recommendations for:
-1. Insurance companies (pricing strategy)
-2. Policyholders (when to buy, what to expect)
-3. Planning focus (which scenario to use for strategic planning)]
-
-Be specific, use numbers, and make it actionable. Format with clear headings."""
+        scenario_text = "\n".join([
+            _COMPARISON_SCENARIO_TMPL % (
+                s['scenario'].upper(),
+                f"{s['start']:,.2f}", sum_insured_info,
+                f"{s['end']:,.2f}", sum_insured_info,
+                s['change'], s['avg_inflation'], s['avg_interest'], s['volatility']
+            )
+            for s in scenario_summaries
+        ])
+        
+        prompt = _COMPARISON_TMPL.format(
+            filter_context=filter_context,
+            scenario_text=scenario_text,
+            format_instructions=_json_instructions(_COMPARISON_SECTIONS)
+        )
 
-        try:
-            response = self.llm.invoke(prompt)
-            ai_analysis = response.content
-            
-            return {
-                'analysis': ai_analysis,
-                'scenarios': scenario_details,
-                'best_scenario': best_scenario['scenario'],
-                'worst_scenario': worst_scenario['scenario'],
-                'premium_range': {
-                    'min': best_scenario['end'],
-                    'max': worst_scenario['end'],
-                    'spread': worst_scenario['end'] - best_scenario['end'],
-                    'spread_pct': ((worst_scenario['end'] - best_scenario['end']) / best_scenario['end']) * 100
-                }
+        result = {
+            'scenarios': scenario_details,
+            'best_scenario': best_scenario['scenario'],
+            'worst_scenario': worst_scenario['scenario'],
+            'premium_range': {
+                'min': best_scenario['end'],
+                'max': worst_scenario['end'],
+                'spread': worst_scenario['end'] - best_scenario['end'],
+                'spread_pct': ((worst_scenario['end'] - best_scenario['end']) / best_scenario['end']) * 100
             }
+        }
+        return prompt, result
+    
+    def generate_scenario_comparison(self, comparison_df: pd.DataFrame, filters: Dict = None) -> Dict:
+        """Generate structured comparison between scenarios with metrics"""
+        prompt, result = self._prepare_scenario_comparison(comparison_df, filters)
+        
+        try:
+            ai_analysis, sections = _parse_sections(
+                self._cached_invoke(prompt, json_mode=True), _COMPARISON_SECTIONS
+            )
         except Exception as e:
-            return {
-                'analysis': f"Error generating comparison: {str(e)}",
-                'scenarios': scenario_details,
-                'best_scenario': best_scenario['scenario'],
-                'worst_scenario': worst_scenario['scenario'],
-                'premium_range': {
-                    'min': best_scenario['end'],
-                    'max': worst_scenario['end'],
-                    'spread': worst_scenario['end'] - best_scenario['end'],
-                    'spread_pct': ((worst_scenario['end'] - best_scenario['end']) / best_scenario['end']) * 100
-                }
-            }
+            ai_analysis, sections = f"Error generating comparison: {str(e)}", None
+        
+        return {'analysis': ai_analysis, 'analysis_sections': sections, **result}
     
-    def generate_driver_analysis(self, forecast_df: pd.DataFrame,
-                                scenario_name: str = "base", filters: Dict = None) -> str:
-        """Analyze the main drivers of premium changes"""
-        scenario_data = forecast_df[forecast_df['scenario'] == scenario_name].copy()
+    async def agenerate_scenario_comparison(self, comparison_df: pd.DataFrame,
+                                            filters: Dict = None) -> Dict:
+        """Async variant of generate_scenario_comparison"""
+        prompt, result = self._prepare_scenario_comparison(comparison_df, filters)
+        
+        try:
+            ai_analysis, sections = _parse_sections(
+                await self._acached_invoke(prompt, json_mode=True), _COMPARISON_SECTIONS
+            )
+        except Exception as e:
+            ai_analysis, sections = f"Error generating comparison: {str(e)}", None
+        
+        return {'analysis': ai_analysis, 'analysis_sections': sections, **result}
+    
+    def _prepare_driver_analysis(self, forecast_df: pd.DataFrame,
+                                 scenario_name: str = "base", filters: Dict = None) -> str:
+        """Build the driver analysis prompt"""
+        scenario_stats = next(_scenario_stats(forecast_df).loc[[scenario_name]].itertuples())
         
         # Calculate correlations and changes
-        premium_change = ((scenario_data.iloc[-1]['average_premium'] - 
-                          scenario_data.iloc[0]['average_premium']) / 
-                         scenario_data.iloc[0]['average_premium']) * 100
+        premium_change = scenario_stats.change_pct
         
-        inflation_change = scenario_data.iloc[-1]['inflation_rate'] - scenario_data.iloc[0]['inflation_rate']
-        interest_change = scenario_data.iloc[-1]['interest_rate'] - scenario_data.iloc[0]['interest_rate']
+        inflation_change = scenario_stats.inflation_end - scenario_stats.inflation_start
+        interest_change = scenario_stats.interest_end - scenario_stats.interest_start
         
-        avg_inflation = scenario_data['inflation_rate'].mean()
-        avg_interest = scenario_data['interest_rate'].mean()
+        avg_inflation = scenario_stats.avg_inflation
+        avg_interest = scenario_stats.avg_interest
         
         # Build filter context
         filter_context = ""
-        if filters:
-            filter_parts = []
-            if filters.get('gender') and filters['gender'] != 'All':
-                filter_parts.append(f"Gender: {filters['gender']}")
-            if filters.get('smoking_status') and filters['smoking_status'] != 'All':
-                filter_parts.append(f"Smoking Status: {filters['smoking_status']}")
-            if filters.get('sum_insured'):
-                si_value = filters['sum_insured']
-                if si_value == 10000000:
-                    si_label = "₹1 Crore"
-                elif si_value == 1000000:
-                    si_label = "₹10 Lakh"
-                else:
-                    si_label = f"₹{si_value/100000:.0f} Lakh"
-                filter_parts.append(f"Sum Insured: {si_label}")
-            if filter_parts:
-                filter_context = f"\n\nNote: Analysis is filtered for {', '.join(filter_parts)}.\n"
-        
-        prompt = f"""You are an expert insurance pricing analyst. Analyze the drivers of life insurance premium changes.{filter_context}
-
-Premium Change Over Period: {premium_change:+.1f}%
-Average Inflation Rate: {avg_inflation:.2f}%
-Average Interest Rate: {avg_interest:.2f}%
-Inflation Change: {inflation_change:+.2f} percentage points
-Interest Rate Change: {interest_change:+.2f} percentage points
-
-Explain:
-1. How inflation affects life insurance premiums
-2. How interest rates affect premiums (both present value and investment income effects)
-3. The combined impact of these economic factors
-4. Other factors that might influence premiums (mortality trends, longevity, smoking status, sum insured)
-
-Be clear and educational (2-3 paragraphs)."""
-
+        filter_text = _build_filter_context(filters, [('gender', 'Gender'), ('smoking_status', 'Smoking Status')])
+        if filter_text:
+            filter_context = f"\n\nNote: Analysis is filtered for {filter_text}.\n"
+        
+        prompt = _DRIVER_TMPL.format(
+            filter_context=filter_context,
+            premium_change=premium_change,
+            avg_inflation=avg_inflation,
+            avg_interest=avg_interest,
+            inflation_change=inflation_change,
+            interest_change=interest_change
+        )
+        return prompt
+    
+    def generate_driver_analysis(self, forecast_df: pd.DataFrame,
+                                scenario_name: str = "base", filters: Dict = None) -> str:
+        """Analyze the main drivers of premium changes"""
+        prompt = self._prepare_driver_analysis(forecast_df, scenario_name, filters)
+        
         try:
-            response = self.llm.invoke(prompt)
-            return response.content
+            return self._cached_invoke(prompt)
         except Exception as e:
             return f"Error generating driver analysis: {str(e)}"
     
-    def generate_recommendations(self, comparison_df: pd.DataFrame, filters: Dict = None) -> Dict:
-        """Generate structured, actionable recommendations with priorities"""
-        scenarios = comparison_df['scenario'].unique()
+    async def agenerate_driver_analysis(self, forecast_df: pd.DataFrame,
+                                        scenario_name: str = "base", filters: Dict = None) -> str:
+        """Async variant of generate_driver_analysis"""
+        prompt = self._prepare_driver_analysis(forecast_df, scenario_name, filters)
+        
+        try:
+            return await self._acached_invoke(prompt)
+        except Exception as e:
+            return f"Error generating driver analysis: {str(e)}"
+    
+    def _prepare_recommendations(self, comparison_df: pd.DataFrame, filters: Dict = None,
+                                 structured: bool = True) -> Tuple[str, Dict]:
+        """Build the recommendations prompt and its metrics (without the AI text)
+        
+        structured asks for the JSON sections; otherwise the prompt requests
+        free-text markdown, which suits streaming.
+        """
+        stats = _scenario_stats(comparison_df)
+        scenarios = stats.index
         
         scenario_stats = {}
-        for scenario in scenarios:
-            scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-            start_premium = scenario_data.iloc[0]['average_premium']
-            end_premium = scenario_data.iloc[-1]['average_premium']
-            change_pct = ((end_premium - start_premium) / start_premium) * 100
-            
-            scenario_stats[scenario] = {
-                'start': start_premium,
-                'end': end_premium,
-                'change_pct': change_pct,
-                'avg_inflation': scenario_data['inflation_rate'].mean(),
-                'avg_interest': scenario_data['interest_rate'].mean(),
-                'avg_gdp': scenario_data['gdp_growth'].mean()
+        for row in stats.itertuples():
+            scenario_stats[row.Index] = {
+                'start': row.start,
+                'end': row.end,
+                'change_pct': row.change_pct,
+                'avg_inflation': row.avg_inflation,
+                'avg_interest': row.avg_interest,
+                'avg_gdp': row.avg_gdp
             }
         
         # Calculate key metrics for recommendations
@@ -347,13 +885,15 @@ Be clear and educational (2-3 paragraphs)."""
             int_val = scenario_stats[s]['avg_interest']
             gdp_val = scenario_stats[s]['avg_gdp']
             
-            scenario_lines.append(f"""
-{s.upper()} SCENARIO:
-- Starting Premium: ₹{start_val:,.2f}
-- 10-Year Forecast: ₹{end_val:,.2f}
-- Change: {change_val:+.1f}%
-- Economic Conditions: Inflation {inf_val:.2f}%, Interest {int_val:.2f}%, GDP {gdp_val:.2f}%
-""")
+            scenario_lines.append(_RECOMMENDATION_SCENARIO_TMPL.format(
+                scenario=s.upper(),
+                start_val=start_val,
+                end_val=end_val,
+                change_val=change_val,
+                inf_val=inf_val,
+                int_val=int_val,
+                gdp_val=gdp_val
+            ))
         
         scenario_analysis_text = "\n".join(scenario_lines)
         spread = max_premium - min_premium
@@ -361,151 +901,199 @@ Be clear and educational (2-3 paragraphs)."""
         
         # Build filter context
         filter_context = ""
-        if filters:
-            filter_parts = []
-            if filters.get('gender') and filters['gender'] != 'All':
-                filter_parts.append(f"Gender: {filters['gender']}")
-            if filters.get('group') and filters['group'] != 'All':
-                filter_parts.append(f"Group: {filters['group']}")
-            if filters.get('policy_type') and filters['policy_type'] != 'All':
-                filter_parts.append(f"Policy Type: {filters['policy_type']}")
-            if filters.get('smoking_status') and filters['smoking_status'] != 'All':
-                filter_parts.append(f"Smoking Status: {filters['smoking_status']}")
-            if filters.get('sum_insured'):
-                si_value = filters['sum_insured']
-                if si_value == 10000000:
-                    si_label = "₹1 Crore"
-                elif si_value == 1000000:
-                    si_label = "₹10 Lakh"
-                else:
-                    si_label = f"₹{si_value/100000:.0f} Lakh"
-                filter_parts.append(f"Sum Insured: {si_label}")
-            if filters.get('age_min') or filters.get('age_max'):
-                age_min = filters.get('age_min', 20)
-                age_max = filters.get('age_max', 80)
-                if age_min != 20 or age_max != 80:
-                    filter_parts.append(f"Age: {age_min}-{age_max} years")
-            if filter_parts:
-                filter_context = f"\n\nFILTER CONTEXT:\nRecommendations are tailored for: {', '.join(filter_parts)}.\n"
-        
-        prompt = f"""You are an expert insurance consultant and actuarial advisor providing strategic recommendations.{filter_context}
-
-PREMIUM FORECAST ANALYSIS:
-{scenario_analysis_text}
-
-KEY METRICS:
-- Average Premium Increase Across Scenarios: {avg_premium_increase:.1f}%
-- Premium Range: ₹{min_premium:,.2f} - ₹{max_premium:,.2f}
-- Spread: ₹{spread:,.2f} ({spread_pct:.1f}%)
-
-Provide structured recommendations in this format:
-
-## FOR INSURANCE COMPANIES
-
-### Pricing Strategy
-[2-3 specific recommendations about pricing adjustments]
-
-### Capital Planning
-[Recommendations for reserve management and capital allocation]
-
-### Product Development
-[Suggestions for new products or modifications]
-
-### Risk Management
-[Key risks to monitor and mitigate]
-
-## FOR POLICYHOLDERS
-
-### Best Time to Purchase
-[When should customers buy based on forecasts]
-
-### What to Expect
-[Expected premium changes and planning considerations]
-
-### Policy Selection
-[Recommendations on policy types and terms]
-
-## STRATEGIC PLANNING
-
-### Recommended Scenario for Planning
-[Which scenario to use and why]
-
-### Key Assumptions to Monitor
-[What economic/mortality factors to watch]
-
-### Action Timeline
-[When to take specific actions]
-
-Be specific, use numbers, prioritize actions, and make it immediately actionable."""
+        filter_text = _build_filter_context(filters, age_label="Age")
+        if filter_text:
+            filter_context = f"\n\nFILTER CONTEXT:\nRecommendations are tailored for: {filter_text}.\n"
+        
+        prompt = _RECOMMENDATIONS_TMPL.format(
+            filter_context=filter_context,
+            scenario_analysis_text=scenario_analysis_text,
+            avg_premium_increase=avg_premium_increase,
+            min_premium=min_premium,
+            max_premium=max_premium,
+            spread=spread,
+            spread_pct=spread_pct,
+            format_instructions=(_json_instructions(_RECOMMENDATION_SECTIONS) if structured
+                                 else _RECOMMENDATIONS_MARKDOWN_FORMAT)
+        )
 
+        result = {
+            'metrics': {
+                'avg_premium_increase': avg_premium_increase,
+                'premium_range': {'min': min_premium, 'max': max_premium},
+                'spread': max_premium - min_premium,
+                'spread_pct': ((max_premium - min_premium) / min_premium) * 100
+            },
+            'scenario_stats': scenario_stats
+        }
+        return prompt, result
+    
+    def generate_recommendations(self, comparison_df: pd.DataFrame, filters: Dict = None) -> Dict:
+        """Generate structured, actionable recommendations with priorities"""
+        prompt, result = self._prepare_recommendations(comparison_df, filters)
+        
         try:
-            response = self.llm.invoke(prompt)
-            ai_recommendations = response.content
-            
-            return {
-                'recommendations': ai_recommendations,
-                'metrics': {
-                    'avg_premium_increase': avg_premium_increase,
-                    'premium_range': {'min': min_premium, 'max': max_premium},
-                    'spread': max_premium - min_premium,
-                    'spread_pct': ((max_premium - min_premium) / min_premium) * 100
-                },
-                'scenario_stats': scenario_stats
-            }
+            ai_recommendations, sections = _parse_sections(
+                self._cached_invoke(prompt, json_mode=True), _RECOMMENDATION_SECTIONS
+            )
         except Exception as e:
-            return {
-                'recommendations': f"Error generating recommendations: {str(e)}",
-                'metrics': {
-                    'avg_premium_increase': avg_premium_increase,
-                    'premium_range': {'min': min_premium, 'max': max_premium},
-                    'spread': max_premium - min_premium,
-                    'spread_pct': ((max_premium - min_premium) / min_premium) * 100
-                },
-                'scenario_stats': scenario_stats
-            }
+            ai_recommendations, sections = f"Error generating recommendations: {str(e)}", None
+        
+        return {'recommendations': ai_recommendations, 'recommendation_sections': sections, **result}
+    
+    async def agenerate_recommendations(self, comparison_df: pd.DataFrame,
+                                        filters: Dict = None) -> Dict:
+        """Async variant of generate_recommendations"""
+        prompt, result = self._prepare_recommendations(comparison_df, filters)
+        
+        try:
+            ai_recommendations, sections = _parse_sections(
+                await self._acached_invoke(prompt, json_mode=True), _RECOMMENDATION_SECTIONS
+            )
+        except Exception as e:
+            ai_recommendations, sections = f"Error generating recommendations: {str(e)}", None
+        
+        return {'recommendations': ai_recommendations, 'recommendation_sections': sections, **result}
+    
+    def stream_recommendations(self, comparison_df: pd.DataFrame,
+                               filters: Dict = None) -> Iterator[str]:
+        """Yield the recommendations text as it is generated (for st.write_stream)
+        
+        A cached response is yielded in one piece; a freshly streamed one is
+        cached once complete.
+        """
+        prompt, _ = self._prepare_recommendations(comparison_df, filters, structured=False)
+        key = LLMCache.make_key(self.model_name, prompt)
+        content = self.cache.get(key)
+        if content is not None:
+            yield content
+            return
+        
+        parts = []
+        try:
+            for chunk in self.llm.stream(prompt):
+                parts.append(chunk.content)
+                yield chunk.content
+        except Exception as e:
+            yield f"Error generating recommendations: {str(e)}"
+            return
+        self.cache.set(key, "".join(parts))
+    
+    def get_recommendation_metrics(self, comparison_df: pd.DataFrame) -> Dict:
+        """Metrics and per-scenario stats that accompany the recommendations"""
+        _, result = self._prepare_recommendations(comparison_df)
+        return result
+    
+    async def generate_all(self, forecast_df: Optional[pd.DataFrame] = None,
+                           comparison_df: Optional[pd.DataFrame] = None,
+                           scenario_name: str = "base", filters: Dict = None,
+                           include_recommendations: bool = True) -> Dict:
+        """Generate all applicable insights concurrently
+        
+        Summary and driver analysis are produced for forecast_df, the scenario
+        comparison for comparison_df. Recommendations use comparison_df when
+        given, otherwise forecast_df; pass include_recommendations=False when
+        they are streamed separately. The Groq requests are issued together with
+        asyncio.gather, so the total wait is roughly that of the slowest call.
+        """
+        tasks = {}
+        if forecast_df is not None:
+            tasks['summary'] = self.agenerate_forecast_summary(forecast_df, scenario_name)
+            tasks['driver_analysis'] = self.agenerate_driver_analysis(forecast_df, scenario_name, filters)
+        if comparison_df is not None:
+            tasks['comparison'] = self.agenerate_scenario_comparison(comparison_df, filters)
+        recommendations_df = comparison_df if comparison_df is not None else forecast_df
+        if include_recommendations and recommendations_df is not None:
+            tasks['recommendations'] = self.agenerate_recommendations(recommendations_df, filters)
+        
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return dict(zip(tasks.keys(), results))
+    
+    def generate_full_report(self, forecast_df: Optional[pd.DataFrame] = None,
+                             comparison_df: Optional[pd.DataFrame] = None,
+                             scenario_name: str = "base", filters: Dict = None,
+                             include_recommendations: bool = True) -> Dict:
+        """Generate all applicable insights with a single Groq request
+        
+        Takes the same arguments and returns the same keys as generate_all, but
+        sends every section prompt in one JSON-mode completion, so the shared
+        context is processed once and only one round-trip is paid. If the
+        request fails or the reply is not the expected JSON object, the sections
+        that are missing fall back to their individual (concurrent) calls.
+        """
+        sections = {}
+        comparison_result = recommendations_result = None
+        if forecast_df is not None:
+            summary_prompt = self._prepare_forecast_summary(forecast_df, scenario_name)
+            if summary_prompt is not None:
+                sections['summary'] = summary_prompt
+                sections['driver_analysis'] = self._prepare_driver_analysis(forecast_df, scenario_name, filters)
+        if comparison_df is not None:
+            sections['comparison'], comparison_result = self._prepare_scenario_comparison(comparison_df, filters)
+        recommendations_df = comparison_df if comparison_df is not None else forecast_df
+        if not include_recommendations:
+            recommendations_df = None
+        if recommendations_df is not None:
+            sections['recommendations'], recommendations_result = self._prepare_recommendations(recommendations_df, filters)
+        
+        texts = {}
+        if sections:
+            task_text = "\n\n".join(
+                f"=== TASK \"{key}\" ===\n{prompt}" for key, prompt in sections.items()
+            )
+            keys = ", ".join(f'"{key}"' for key in sections)
+            prompt = _FULL_REPORT_TMPL.format(n_tasks=len(sections), task_text=task_text, keys=keys)
+            try:
+                parsed = json.loads(self._cached_invoke(prompt, json_mode=True))
+                if isinstance(parsed, dict):
+                    structured = ('comparison', 'recommendations')
+                    texts = {key: parsed[key] for key in sections
+                             if isinstance(parsed.get(key), str)
+                             or (key in structured and isinstance(parsed.get(key), dict))}
+            except Exception:
+                texts = {}
+        
+        report = {}
+        fallback = {}
+        if forecast_df is not None:
+            if 'summary' in texts:
+                report['summary'] = texts['summary']
+            else:
+                fallback['summary'] = self.agenerate_forecast_summary(forecast_df, scenario_name)
+            if 'driver_analysis' in texts:
+                report['driver_analysis'] = texts['driver_analysis']
+            else:
+                fallback['driver_analysis'] = self.agenerate_driver_analysis(forecast_df, scenario_name, filters)
+        if comparison_df is not None:
+            if 'comparison' in texts:
+                analysis, analysis_sections = _parse_sections(texts['comparison'], _COMPARISON_SECTIONS)
+                report['comparison'] = {'analysis': analysis, 'analysis_sections': analysis_sections,
+                                        **comparison_result}
+            else:
+                fallback['comparison'] = self.agenerate_scenario_comparison(comparison_df, filters)
+        if recommendations_df is not None:
+            if 'recommendations' in texts:
+                recommendations, recommendation_sections = _parse_sections(
+                    texts['recommendations'], _RECOMMENDATION_SECTIONS
+                )
+                report['recommendations'] = {'recommendations': recommendations,
+                                             'recommendation_sections': recommendation_sections,
+                                             **recommendations_result}
+            else:
+                fallback['recommendations'] = self.agenerate_recommendations(recommendations_df, filters)
+        
+        if fallback:
+            async def _gather():
+                return await asyncio.gather(*fallback.values(), return_exceptions=True)
+            report.update(zip(fallback.keys(), run_async(_gather())))
+        return report
     
     def calculate_driver_impact(self, forecast_df: pd.DataFrame) -> Dict:
-        """Calculate the impact of different drivers on premium changes"""
+        """Calculate the impact of different drivers on premium changes
+        
+        Memoized on the frame's content, so reruns over an unchanged forecast
+        skip the correlations; the returned dict is shared, treat it as read-only.
+        """
         if forecast_df.empty:
             return {}
-        
-        # Calculate correlations
-        premium_change = forecast_df['average_premium'].pct_change().fillna(0)
-        inflation_change = forecast_df['inflation_rate'].diff().fillna(0)
-        interest_change = forecast_df['interest_rate'].diff().fillna(0)
-        gdp_change = forecast_df.get('gdp_growth', pd.Series([0] * len(forecast_df))).diff().fillna(0)
-        
-        # Calculate correlation coefficients
-        inflation_corr = premium_change.corr(inflation_change) if len(premium_change) > 1 else 0
-        interest_corr = premium_change.corr(interest_change) if len(premium_change) > 1 else 0
-        gdp_corr = premium_change.corr(gdp_change) if len(gdp_change) > 1 else 0
-        
-        # Calculate overall impact
-        total_premium_change = ((forecast_df.iloc[-1]['average_premium'] - 
-                                forecast_df.iloc[0]['average_premium']) / 
-                               forecast_df.iloc[0]['average_premium']) * 100
-        
-        avg_inflation = forecast_df['inflation_rate'].mean()
-        avg_interest = forecast_df['interest_rate'].mean()
-        avg_gdp = forecast_df.get('gdp_growth', pd.Series([0])).mean()
-        
-        return {
-            'total_premium_change_pct': total_premium_change,
-            'drivers': {
-                'inflation': {
-                    'correlation': inflation_corr,
-                    'avg_value': avg_inflation,
-                    'impact': 'High' if abs(inflation_corr) > 0.5 else 'Medium' if abs(inflation_corr) > 0.3 else 'Low'
-                },
-                'interest_rate': {
-                    'correlation': interest_corr,
-                    'avg_value': avg_interest,
-                    'impact': 'High' if abs(interest_corr) > 0.5 else 'Medium' if abs(interest_corr) > 0.3 else 'Low'
-                },
-                'gdp_growth': {
-                    'correlation': gdp_corr,
-                    'avg_value': avg_gdp,
-                    'impact': 'High' if abs(gdp_corr) > 0.5 else 'Medium' if abs(gdp_corr) > 0.3 else 'Low'
-                }
-            }
-        }
+        return _cached_driver_impact(_frame_key(forecast_df))
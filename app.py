@@ -3,14 +3,20 @@ Streamlit dashboard for Life Insurance Premium Forecasting.
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import os
+import re
+import io
+import html
+from functools import partial
 from data_models import Gender, PolicyType
-from forecasting_engine import PremiumForecaster
-from ai_insights import PremiumInsightsGenerator
+from forecasting_engine import PremiumForecaster, align_label_categories
+from ai_insights import PremiumInsightsGenerator, run_async
 from chat_interface import DashboardChatInterface
+from create_data_csvs import CSV_DTYPES, generate_data
 
 # Page configuration
 st.set_page_config(
@@ -20,9 +26,38 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Sum insured selector options, with the reverse lookup used to preselect a chat-parsed value
+SUM_INSURED_OPTIONS = {
+    "₹10 Lakh": 1000000,
+    "₹25 Lakh": 2500000,
+    "₹50 Lakh": 5000000,
+    "₹1 Crore": 10000000,
+    "₹2 Crore": 20000000,
+    "All": None
+}
+SUM_INSURED_LABELS = list(SUM_INSURED_OPTIONS.keys())
+SUM_INSURED_IDX_BY_VALUE = {
+    value: idx for idx, value in enumerate(SUM_INSURED_OPTIONS.values()) if value is not None
+}
+
+# Shared legend and margins of the small per-indicator charts, built once per process
+SMALL_CHART_LAYOUT = go.Layout(
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=1.01,
+        xanchor="center",
+        x=0.5,
+        bgcolor='rgba(255,255,255,0.95)',
+        bordercolor='rgba(0,0,0,0.3)',
+        borderwidth=1,
+        font=dict(size=10)
+    ),
+    margin=dict(t=80, b=60, l=60, r=50)
+)
+
 # Custom CSS
-st.markdown("""
-    <style>
+CUSTOM_CSS = """
     .main-header {
         font-size: 2.5rem;
         font-weight: bold;
@@ -135,8 +170,32 @@ st.markdown("""
         background-color: white;
         border-radius: 0 0 12px 12px;
     }
-    </style>
-""", unsafe_allow_html=True)
+    
+    /* Chat history (rendered as one HTML block) */
+    .chat-msg {
+        padding: 0.5rem 0.75rem;
+        margin: 0.4rem 0;
+        border-radius: 0.5rem;
+        white-space: pre-wrap;
+    }
+    
+    .chat-msg.user {
+        background-color: #f0f2f6;
+        margin-left: 15%;
+    }
+    
+    .chat-msg.assistant {
+        background-color: #e8f1fa;
+        margin-right: 15%;
+    }
+"""
+
+
+@st.cache_resource
+def _minified_css():
+    """CUSTOM_CSS without comments and redundant whitespace, computed once per server process"""
+    css = re.sub(r'/\*.*?\*/', '', CUSTOM_CSS, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
 
 # Initialize session state
 if 'data_loaded' not in st.session_state:
@@ -155,15 +214,66 @@ if 'chat_open' not in st.session_state:
     st.session_state.chat_open = False
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour, but will refresh if CSV files change
+def _read_csv(path):
+    """
+    Read a CSV, preferring a typed Parquet copy kept next to it.
+    
+    The copy is (re)written whenever it is missing or older than the CSV, so
+    later loads skip text parsing and type inference entirely; it is read through
+    a memory map rather than buffered reads.
+    """
+    parquet_path = os.path.splitext(path)[0] + '.parquet'
+    try:
+        if os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+            return pd.read_parquet(parquet_path, engine='pyarrow', memory_map=True)
+    except (OSError, ImportError, ValueError):
+        pass
+    
+    # Narrow types are applied while parsing (columns a file lacks are ignored), so the
+    # cached copy is written typed as well; _load_data still aligns the label categories
+    try:
+        df = pd.read_csv(path, engine='pyarrow', dtype=CSV_DTYPES)
+    except ImportError:
+        return pd.read_csv(path, dtype=CSV_DTYPES)
+    
+    # Best effort: write to a temporary file and swap it in, so a reader never sees a partial copy
+    try:
+        tmp_path = parquet_path + '.tmp'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+    except (OSError, ImportError, ValueError):
+        pass
+    return df
+
+
+DATA_DIR = 'data'
+CSV_FILES = ['mortality_data.csv', 'economic_data.csv', 'base_premiums.csv', 'demographic_distribution.csv']
+
+
+def data_version():
+    """Modification times of the CSV files: part of every cache key derived from the data"""
+    return tuple(
+        os.path.getmtime(path) if os.path.exists(path) else None
+        for path in (os.path.join(DATA_DIR, f) for f in CSV_FILES)
+    )
+
+
 def load_data():
+    """Load data from CSV files, keyed on their modification times so edits invalidate the cache"""
+    return _load_data(data_version())
+
+
+# Read-only reference data: one shared copy for all sessions instead of a pickled copy per
+# caller. Callers must not mutate the returned frames (filter, then .copy() before writing).
+@st.cache_resource(ttl=3600, show_spinner=False)  # Cache for 1 hour, but will refresh if CSV files change
+def _load_data(mtimes):
     """Load data from CSV files, auto-generating if missing"""
     try:
         # Define data directory
-        data_dir = 'data'
+        data_dir = DATA_DIR
         
         # Check if data directory exists or CSV files are missing
-        csv_files = ['mortality_data.csv', 'economic_data.csv', 'base_premiums.csv', 'demographic_distribution.csv']
+        csv_files = CSV_FILES
         data_missing = not os.path.exists(data_dir) or any(
             not os.path.exists(os.path.join(data_dir, f)) for f in csv_files
         )
@@ -171,34 +281,42 @@ def load_data():
         # Auto-generate data if missing (for Streamlit Cloud deployment)
         if data_missing:
             with st.spinner("Generating data files (first time setup)..."):
-                from create_data_csvs import generate_data
                 generate_data(data_dir)
         
         # Load CSV files
-        mortality_df = pd.read_csv(os.path.join(data_dir, 'mortality_data.csv'))
-        economic_df = pd.read_csv(os.path.join(data_dir, 'economic_data.csv'))
-        base_premium_df = pd.read_csv(os.path.join(data_dir, 'base_premiums.csv'))
-        demographic_df = pd.read_csv(os.path.join(data_dir, 'demographic_distribution.csv'))
+        mortality_df = _read_csv(os.path.join(data_dir, 'mortality_data.csv'))
+        economic_df = _read_csv(os.path.join(data_dir, 'economic_data.csv'))
+        base_premium_df = _read_csv(os.path.join(data_dir, 'base_premiums.csv'))
+        demographic_df = _read_csv(os.path.join(data_dir, 'demographic_distribution.csv'))
         
         # Validate data was loaded
         if mortality_df.empty or economic_df.empty or base_premium_df.empty or demographic_df.empty:
             raise ValueError("One or more CSV files are empty. Please regenerate data files.")
         
-        # Ensure correct data types
-        mortality_df['year'] = mortality_df['year'].astype(int)
-        mortality_df['age'] = mortality_df['age'].astype(int)
-        economic_df['year'] = economic_df['year'].astype(int)
-        base_premium_df['age'] = base_premium_df['age'].astype(int)
-        demographic_df['age'] = demographic_df['age'].astype(int)
-        demographic_df['policy_count'] = demographic_df['policy_count'].astype(int)
-        
-        # Ensure smoking_status is string type if it exists (for consistent filtering)
-        if 'smoking_status' in mortality_df.columns:
-            mortality_df['smoking_status'] = mortality_df['smoking_status'].astype(str)
-        if 'smoking_status' in base_premium_df.columns:
-            base_premium_df['smoking_status'] = base_premium_df['smoking_status'].astype(str)
-        if 'smoking_status' in demographic_df.columns:
-            demographic_df['smoking_status'] = demographic_df['smoking_status'].astype(str)
+        # Ensure correct data types (the parser usually infers these already)
+        for df, col in [(mortality_df, 'year'), (mortality_df, 'age'), (economic_df, 'year'),
+                        (base_premium_df, 'age'), (demographic_df, 'age'), (demographic_df, 'policy_count')]:
+            if not pd.api.types.is_integer_dtype(df[col]):
+                df[col] = df[col].astype(int)
+        
+        # Ensure smoking_status is string type if it exists (for consistent filtering);
+        # it normally arrives as a categorical of strings already
+        for df in (mortality_df, base_premium_df, demographic_df):
+            if 'smoking_status' in df.columns and df['smoking_status'].dtype == object:
+                df['smoking_status'] = df['smoking_status'].astype(str)
+        
+        # Low-cardinality label columns as categoricals, with the same categories in
+        # every file so merges and filters compare integer codes
+        frames = align_label_categories(mortality_df, economic_df, base_premium_df, demographic_df)
+        mortality_df, economic_df, base_premium_df, demographic_df = frames
+        
+        # Narrow the integer key columns (the same width in every file, so merge keys
+        # still line up); sum_insured stays int64 as it is multiplied by policy counts,
+        # and the rates stay float64 as they feed the compounding premium arithmetic
+        for col, dtype in [('year', 'int16'), ('age', 'int8'), ('policy_count', 'int32')]:
+            for df in frames:
+                if col in df.columns:
+                    df[col] = df[col].astype(dtype)
         
         return mortality_df, economic_df, base_premium_df, demographic_df
     except FileNotFoundError as e:
@@ -215,7 +333,8 @@ def initialize_forecaster():
     """Initialize the forecaster"""
     if st.session_state.forecaster is None:
         try:
-            mortality_df, economic_df, base_premium_df, demographic_df = load_data()
+            version = data_version()
+            mortality_df, economic_df, base_premium_df, demographic_df = _load_data(version)
             
             # Validate data before creating forecaster
             if mortality_df.empty:
@@ -231,9 +350,10 @@ def initialize_forecaster():
                 st.error("Error: Demographic data is empty. Please refresh the page.")
                 return
             
-            # Check if India data exists
-            if 'India' not in mortality_df['country'].unique():
-                st.error(f"Error: India not found in mortality data. Available: {list(mortality_df['country'].unique())}")
+            # Check if India data exists (one scan of the column, reused for the message)
+            valid_countries = frozenset(mortality_df['country'].unique())
+            if 'India' not in valid_countries:
+                st.error(f"Error: India not found in mortality data. Available: {sorted(valid_countries)}")
                 return
             
             # Validate smoking_status column exists in all required dataframes
@@ -246,9 +366,7 @@ def initialize_forecaster():
                 if col not in demographic_df.columns:
                     st.warning(f"Warning: {col} not found in demographic data. Some filters may not work.")
             
-            st.session_state.forecaster = PremiumForecaster(
-                mortality_df, economic_df, base_premium_df, demographic_df
-            )
+            st.session_state.forecaster = get_forecaster(version)
         except Exception as e:
             st.error(f"Error initializing forecaster: {str(e)}")
             st.exception(e)
@@ -273,30 +391,255 @@ def initialize_chat():
             pass
 
 
-def prepare_filtered_data_table(mortality_df, economic_df, base_premium_df, demographic_df, 
-                                start_year, end_year, filters, country="India", scenario_name=None):
+def render_chat_messages(messages):
+    """Render chat messages as a single HTML block instead of one chat_message element each"""
+    if messages:
+        st.markdown(
+            ''.join(
+                f'<div class="chat-msg {"user" if m["role"] == "user" else "assistant"}">'
+                f'{html.escape(str(m["content"]))}</div>'
+                for m in messages
+            ),
+            unsafe_allow_html=True
+        )
+
+
+def toggle_chat():
+    """Button callback: flip the chat window before the rerun the click triggers"""
+    # The chat client is only built the first time the window is opened
+    initialize_chat()
+    st.session_state.chat_open = (not st.session_state.chat_open
+                                  and st.session_state.chat_interface is not None)
+
+
+def close_chat():
+    """Button callback: close the chat window before the rerun the click triggers"""
+    st.session_state.chat_open = False
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def get_forecaster(version):
+    """One PremiumForecaster per data version, shared by all sessions (it only reads its frames)"""
+    return PremiumForecaster(*_load_data(version))
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
+def _cached_compare(version, start_year, end_year, country, filters):
+    """compare_scenarios memoized on its arguments and the data version"""
+    return get_forecaster(version).compare_scenarios(start_year, end_year, country, filters)
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=64)
+def _cached_forecast(version, start_year, end_year, scenario, country, filters):
+    """forecast_average_premium memoized on its arguments and the data version"""
+    return get_forecaster(version).forecast_average_premium(start_year, end_year, scenario, country, filters)
+
+
+def scenario_line_traces(by_scenario, column, colors, names):
+    """One line trace per scenario of a comparison column, built in a single pass"""
+    return [
+        go.Scatter(x=scenario_data['year'], y=scenario_data[column],
+                   name=names[scenario],
+                   line=dict(color=colors[scenario], width=2),
+                   mode='lines+markers',
+                   marker=dict(size=6))
+        for scenario, scenario_data in by_scenario.items()
+    ]
+
+
+# Figures only read their inputs once built, so one shared instance per key is safe to
+# hand to st.plotly_chart from every session (it serializes without mutating them)
+@st.cache_resource(ttl=3600, show_spinner=False, max_entries=32)
+def comparison_figures(version, start_year, end_year, country, filters):
+    """Build the comparison view's charts once per forecast; returns figures keyed by chart"""
+    comparison_df = _cached_compare(version, start_year, end_year, country, filters)
+    by_scenario = dict(tuple(comparison_df.groupby('scenario', sort=False, observed=True)))
+    colors = {'base': '#1f77b4', 'optimistic': '#2ca02c', 'pessimistic': '#d62728'}
+    names = {'base': 'Base Case', 'optimistic': 'Optimistic', 'pessimistic': 'Pessimistic'}
+    figures = {}
+    
+    # Scenario comparison chart
+    fig = go.Figure(data=[
+        go.Scatter(
+            x=scenario_data['year'],
+            y=scenario_data['average_premium'],
+            mode='lines+markers',
+            name=names[scenario],
+            line=dict(color=colors[scenario], width=3),
+            marker=dict(size=8)
+        )
+        for scenario, scenario_data in by_scenario.items()
+    ])
+    
+    # Get sum insured info for subtitle
+    sum_insured_info = ""
+    if not comparison_df.empty and 'average_sum_insured' in comparison_df.columns:
+        avg_si = comparison_df['average_sum_insured'].mean()
+        sum_insured_info = f" (Avg Sum Insured: ₹{avg_si/100000:.1f}L)"
+    elif filters.get('_display_sum_insured'):
+        si = filters['_display_sum_insured']
+        sum_insured_info = f" (Sum Insured: ₹{si/100000:.1f}L)"
+    
+    fig.update_layout(
+        title=f"Average Premium Forecast by Scenario{sum_insured_info}",
+        xaxis_title="Year",
+        yaxis_title="Average Premium (₹)",
+        hovermode='x unified',
+        height=500,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    figures['premium'] = fig
+    
+    # Economic indicator charts: (key, column, title, y-axis title)
+    for key, column, title, yaxis_title in [('inflation', 'inflation_rate', "Inflation Rate", "Rate (%)"),
+                                            ('gdp', 'gdp_growth', "GDP Growth", "Rate (%)"),
+                                            ('interest', 'interest_rate', "Interest Rate", "Rate (%)")]:
+        fig = go.Figure(data=scenario_line_traces(by_scenario, column, colors, names),
+                        layout=SMALL_CHART_LAYOUT)
+        fig.update_layout(
+            title=dict(text=title, y=0.97, x=0.5, xanchor='center', yanchor='top'),
+            xaxis_title="Year",
+            yaxis_title=yaxis_title,
+            height=420
+        )
+        figures[key] = fig
+    
+    # Premium vs Interest Rate Chart
+    fig = go.Figure(
+        data=[go.Scatter(x=scenario_data['interest_rate'], y=scenario_data['average_premium'],
+                         name=names[scenario],
+                         mode='markers',
+                         marker=dict(color=colors[scenario], size=8))
+              for scenario, scenario_data in by_scenario.items()],
+        layout=SMALL_CHART_LAYOUT
+    )
+    fig.update_layout(
+        title=dict(text="Premium vs Interest Rate", y=0.97, x=0.5, xanchor='center', yanchor='top'),
+        xaxis_title="Interest Rate (%)",
+        yaxis_title="Premium (₹)",
+        height=420
+    )
+    figures['premium_interest'] = fig
+    
+    # Mortality & Longevity Trends by Scenario
+    if 'average_mortality_rate' in comparison_df.columns and 'average_life_expectancy' in comparison_df.columns:
+        for key, column, title, yaxis_title in [
+            ('mortality', 'average_mortality_rate', "Mortality Rate Trend", "Mortality Rate (per 1000)"),
+            ('life_expectancy', 'average_life_expectancy', "Life Expectancy Trend", "Life Expectancy (years)")
+        ]:
+            fig = go.Figure(data=scenario_line_traces(by_scenario, column, colors, names),
+                            layout=SMALL_CHART_LAYOUT)
+            fig.update_layout(
+                title=dict(text=title, y=0.97, x=0.5, xanchor='center', yanchor='top'),
+                xaxis_title="Year",
+                yaxis_title=yaxis_title,
+                height=470
+            )
+            figures[key] = fig
+    
+    return figures
+
+
+def scenario_detail_metrics(scenarios):
+    """Tab label and two columns of (label, formatted value) metrics per scenario"""
+    return [
+        (scenario.title(), (
+            [("Starting Premium", f"₹{details['start_premium']:,.2f}"),
+             ("Ending Premium", f"₹{details['end_premium']:,.2f}"),
+             ("Total Change", f"{details['change_pct']:+.1f}%")],
+            [("Avg Inflation", f"{details['avg_inflation']:.2f}%"),
+             ("Avg Interest Rate", f"{details['avg_interest']:.2f}%"),
+             ("Premium Volatility", f"{details.get('volatility', 0):.2f}%")]
+        ))
+        for scenario, details in scenarios.items()
+    ]
+
+
+IMPACT_ICONS = {'High': "🔴", 'Medium': "🟡", 'Low': "🟢"}
+
+
+def driver_impact_table(drivers):
+    """One row per driver, so the impact breakdown renders as a single element"""
+    return pd.DataFrame([
+        {
+            'Factor': name.replace('_', ' ').title(),
+            'Correlation': f"{data['correlation']:+.2f}",
+            'Impact': f"{IMPACT_ICONS[data['impact']]} {data['impact']}"
+        }
+        for name, data in drivers.items()
+    ])
+
+
+def _format_sum_insured(x):
+    return f"₹{x/100000:.1f}L" if x < 10000000 else f"₹{x/10000000:.1f}Cr"
+
+
+# Display formatter per data table column
+DISPLAY_FORMATS = {
+    'base_premium': "₹{:,.2f}".format,
+    'premium_per_unit': "₹{:,.2f}".format,
+    'sum_insured': _format_sum_insured,
+    'mortality_rate': "{:.4f}".format,
+    'life_expectancy': "{:.1f}".format,
+    'inflation_rate': "{:.2f}%".format,
+    'interest_rate': "{:.2f}%".format,
+    'gdp_growth': "{:.2f}%".format,
+}
+
+
+def format_column(values, formatter):
+    """Format a column by formatting each distinct value once and mapping the codes back"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    labels = np.array([formatter(v) for v in uniques.tolist()], dtype=object)
+    return labels[codes]
+
+
+def format_display_table(table):
+    """Data table with its numeric columns rendered as display strings
+    
+    The formatted columns are swapped in with assign, so the untouched columns
+    are shared with table rather than deep-copied.
     """
-    Combine and filter all CSV data into a comprehensive table.
-    Returns a DataFrame with all relevant data columns.
+    return table.assign(**{
+        col: format_column(table[col].to_numpy(), formatter)
+        for col, formatter in DISPLAY_FORMATS.items()
+        if col in table.columns
+    })
+
+
+def _table_sort_cols(table):
+    """Display order of the per-age data table: year, age, gender, group, smoking, policy type"""
+    sort_cols = ['year', 'age', 'gender', 'group', 'policy_type']
+    if 'smoking_status' in table.columns:
+        sort_cols.insert(-1, 'smoking_status')
+    return sort_cols
+
+
+def _segment_mask(df, filters, country):
+    """Boolean mask of the rows of df in country that pass the filters on the columns df has"""
+    mask = (df['country'] == country).to_numpy(copy=True)
+    for col in ('gender', 'group', 'policy_type', 'smoking_status', 'sum_insured'):
+        if filters.get(col) and col in df.columns:
+            mask &= (df[col] == filters[col]).to_numpy()
+    if 'age_min' in filters and 'age' in df.columns:
+        mask &= df['age'].to_numpy() >= filters['age_min']
+    if 'age_max' in filters and 'age' in df.columns:
+        mask &= df['age'].to_numpy() <= filters['age_max']
+    return mask
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
+def _filtered_data_table(start_year, end_year, filters, country="India"):
+    """
+    Combine and filter all CSV data into a comprehensive table, memoized on the filters.
+    Returns a DataFrame with all relevant data columns, labelled with the base scenario
+    (the rows do not depend on the scenario; see _label_scenarios).
     """
-    # Start with demographic distribution as base
-    filtered_demo = demographic_df[demographic_df['country'] == country].copy()
+    mortality_df, economic_df, base_premium_df, demographic_df = load_data()
     
-    # Apply filters
-    if 'gender' in filters and filters['gender']:
-        filtered_demo = filtered_demo[filtered_demo['gender'] == filters['gender']]
-    if 'group' in filters and filters['group']:
-        filtered_demo = filtered_demo[filtered_demo['group'] == filters['group']]
-    if 'policy_type' in filters and filters['policy_type']:
-        filtered_demo = filtered_demo[filtered_demo['policy_type'] == filters['policy_type']]
-    if 'smoking_status' in filters and filters['smoking_status']:
-        filtered_demo = filtered_demo[filtered_demo['smoking_status'] == filters['smoking_status']]
-    if 'sum_insured' in filters and filters['sum_insured']:
-        filtered_demo = filtered_demo[filtered_demo['sum_insured'] == filters['sum_insured']]
-    if 'age_min' in filters:
-        filtered_demo = filtered_demo[filtered_demo['age'] >= filters['age_min']]
-    if 'age_max' in filters:
-        filtered_demo = filtered_demo[filtered_demo['age'] <= filters['age_max']]
+    # Start with demographic distribution as base; the same predicates are pushed
+    # down to the premium and mortality rows too, so every join works on the subset
+    filtered_demo = demographic_df[_segment_mask(demographic_df, filters, country)]
     
     # Merge with base premiums (include smoking_status if available)
     merge_cols = ['country', 'group', 'gender', 'age', 'policy_type']
@@ -304,119 +647,150 @@ def prepare_filtered_data_table(mortality_df, economic_df, base_premium_df, demo
         merge_cols.append('smoking_status')
     
     merged = filtered_demo.merge(
-        base_premium_df[base_premium_df['country'] == country],
+        base_premium_df[_segment_mask(base_premium_df, filters, country)],
         on=merge_cols,
         how='inner',
         suffixes=('', '_base')
     )
     
-    # Create rows for each year in the forecast range
-    result_rows = []
-    for year in range(start_year, end_year + 1):
-        # Get economic data for this year
-        year_economic = economic_df[
-            (economic_df['year'] == year) & 
-            (economic_df['country'] == country)
-        ]
-        
-        if year_economic.empty:
-            # Use most recent economic data if not available
-            year_economic = economic_df[
-                (economic_df['year'] == economic_df['year'].max()) & 
-                (economic_df['country'] == country)
-            ]
-        
-        if year_economic.empty:
-            continue
-        
-        econ_data = year_economic.iloc[0]
-        
-        # Get mortality data for this year
-        year_mortality = mortality_df[
-            (mortality_df['year'] == year) & 
-            (mortality_df['country'] == country)
-        ]
-        
-        if year_mortality.empty:
-            # Use most recent mortality data if not available
-            year_mortality = mortality_df[
-                (mortality_df['year'] == mortality_df['year'].max()) & 
-                (mortality_df['country'] == country)
-            ]
-        
-        # For each demographic combination
-        for _, row in merged.iterrows():
-            # Find matching mortality data (include smoking_status if available)
-            mortality_filter = (year_mortality['age'] == row['age']) & \
-                             (year_mortality['gender'] == row['gender'])
-            
-            if 'smoking_status' in row and 'smoking_status' in year_mortality.columns:
-                mortality_filter = mortality_filter & (year_mortality['smoking_status'] == row['smoking_status'])
-            
-            mortality_match = year_mortality[mortality_filter]
-            
-            if mortality_match.empty:
-                continue
-            
-            mortality_data = mortality_match.iloc[0]
-            
-            # Create comprehensive row
-            result_row = {
-                'year': year,
-                'scenario': scenario_name if scenario_name else 'base',
-                'country': country,
-                'group': row['group'],
-                'gender': row['gender'],
-                'age': row['age'],
-                'policy_type': row['policy_type'],
-                'policy_count': row['policy_count'],
-                'mortality_rate': mortality_data['mortality_rate'],
-                'life_expectancy': mortality_data['life_expectancy'],
-                'inflation_rate': econ_data['inflation_rate'],
-                'interest_rate': econ_data['interest_rate'],
-                'gdp_growth': econ_data['gdp_growth']
-            }
-            
-            # Handle premium: use premium_per_unit if available, otherwise base_premium
-            if 'premium_per_unit' in row:
-                result_row['premium_per_unit'] = row['premium_per_unit']
-                # Calculate actual premium if sum_insured is available
-                if 'sum_insured' in row:
-                    result_row['sum_insured'] = row['sum_insured']
-                    result_row['base_premium'] = row['premium_per_unit'] * (row['sum_insured'] / 100000.0)
-                else:
-                    result_row['base_premium'] = row['premium_per_unit'] * 10.0  # Default ₹10 lakh
-            elif 'base_premium' in row:
-                result_row['base_premium'] = row['base_premium']
-                # Calculate premium_per_unit from base_premium (assume ₹10 lakh default)
-                result_row['premium_per_unit'] = row['base_premium'] / 10.0
-            
-            # Include smoking_status if available
-            if 'smoking_status' in row:
-                result_row['smoking_status'] = row['smoking_status']
-            
-            # Include sum_insured if available
-            if 'sum_insured' in row:
-                result_row['sum_insured'] = row['sum_insured']
-            
-            result_rows.append(result_row)
+    if merged.empty:
+        return pd.DataFrame()
     
-    if not result_rows:
+    # Resolve, per forecast year, which economic / mortality year to read: an
+    # as-of lookup picks the year itself or the most recent available year before
+    # it (years before any data fall back to the latest year)
+    country_economic = economic_df[economic_df['country'] == country]
+    country_mortality = mortality_df[_segment_mask(mortality_df, filters, country)]
+    years_df = pd.DataFrame({'year': np.arange(start_year, end_year + 1)})
+    for key, country_rows, latest in (('_econ_year', country_economic, economic_df['year'].max()),
+                                      ('_mort_year', country_mortality, mortality_df['year'].max())):
+        available = pd.DataFrame({key: np.unique(country_rows['year']).astype(np.int64)})
+        years_df = pd.merge_asof(years_df, available, left_on='year', right_on=key, direction='backward')
+        years_df[key] = years_df[key].fillna(latest).astype(int)
+    
+    # Economic and mortality rows indexed by their lookup keys (first row wins)
+    econ_by_year = country_economic.drop_duplicates('year').set_index('year')[
+        ['inflation_rate', 'interest_rate', 'gdp_growth']
+    ]
+    mortality_keys = ['age', 'gender']
+    if 'smoking_status' in merged.columns and 'smoking_status' in mortality_df.columns:
+        mortality_keys.append('smoking_status')
+    mortality_by_key = country_mortality.drop_duplicates(['year'] + mortality_keys).set_index(
+        ['year'] + mortality_keys
+    )[['mortality_rate', 'life_expectancy']]
+    
+    # Years without any economic data are skipped
+    years_df = years_df.join(econ_by_year, on='_econ_year', how='inner')
+    
+    # One row per (year, demographic combination), year-major; rows without a
+    # matching mortality entry are dropped (include smoking_status if available)
+    rows = years_df.merge(merged, how='cross').join(
+        mortality_by_key, on=['_mort_year'] + mortality_keys, how='inner'
+    )
+    
+    if rows.empty:
         return pd.DataFrame()
     
-    return pd.DataFrame(result_rows)
+    # Work on plain column arrays from here on (no per-column index alignment)
+    cols = {name: rows[name].to_numpy() for name in rows.columns}
+    
+    # Display order, sorted on integer keys: the label columns are categoricals whose
+    # categories are in alphabetical order, so their codes sort like the strings
+    keys = [rows[col].cat.codes.to_numpy() if isinstance(rows[col].dtype, pd.CategoricalDtype)
+            else cols[col] for col in _table_sort_cols(rows)]
+    order = np.lexsort(keys[::-1])
+    cols = {name: values[order] for name, values in cols.items()}
+    
+    # Create comprehensive rows: output columns in order, turned into a frame once at the end
+    columns = {
+        'year': cols['year'],
+        'scenario': 'base',
+        'country': country,
+        'group': cols['group'],
+        'gender': cols['gender'],
+        'age': cols['age'],
+        'policy_type': cols['policy_type'],
+        'policy_count': cols['policy_count'],
+        'mortality_rate': cols['mortality_rate'],
+        'life_expectancy': cols['life_expectancy'],
+        'inflation_rate': cols['inflation_rate'],
+        'interest_rate': cols['interest_rate'],
+        'gdp_growth': cols['gdp_growth']
+    }
+    
+    # Handle premium: use premium_per_unit if available, otherwise base_premium
+    if 'premium_per_unit' in cols:
+        columns['premium_per_unit'] = cols['premium_per_unit']
+        # Calculate actual premium if sum_insured is available
+        if 'sum_insured' in cols:
+            columns['sum_insured'] = cols['sum_insured']
+            columns['base_premium'] = cols['premium_per_unit'] * (cols['sum_insured'] / 100000.0)
+        else:
+            columns['base_premium'] = cols['premium_per_unit'] * 10.0  # Default ₹10 lakh
+    elif 'base_premium' in cols:
+        columns['base_premium'] = cols['base_premium']
+        # Calculate premium_per_unit from base_premium (assume ₹10 lakh default)
+        columns['premium_per_unit'] = cols['base_premium'] / 10.0
+    
+    # Include smoking_status if available
+    if 'smoking_status' in cols:
+        columns['smoking_status'] = cols['smoking_status']
+    
+    # Include sum_insured if available
+    if 'sum_insured' in cols:
+        columns['sum_insured'] = cols['sum_insured']
+    
+    table = pd.DataFrame(columns, copy=False)
+    # Already sorted above, once per filter set, in the order the data tables display;
+    # the comparison view concatenates per-scenario copies and keeps this order
+    return table
+
+
+def _label_scenarios(table, scenarios):
+    """table repeated once per scenario label: scenario blocks, each in display order"""
+    if table.empty:
+        return table
+    return pd.concat([table.assign(scenario=scenario) for scenario in scenarios],
+                     ignore_index=True)
+
+
+# Formatted once per filter set and shared like comparison_figures: st.dataframe only
+# reads the frame, so reruns skip formatting tens of thousands of cells
+@st.cache_resource(ttl=3600, show_spinner=False, max_entries=32)
+def display_data_table(start_year, end_year, filters, country, scenarios):
+    """Display-formatted data table for the given scenario labels (treat as read-only)
+    
+    The scenario blocks only differ in their label, so one block is formatted and
+    then repeated.
+    """
+    table = _filtered_data_table(start_year, end_year, filters, country)
+    return _label_scenarios(format_display_table(table), scenarios)
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
+def data_table_csv(start_year, end_year, filters, country, scenarios):
+    """CSV bytes of the data table with one block of rows per scenario label
+    
+    Handed to st.download_button as a callable, so the serialization only runs
+    when the button is clicked, and once per filter set.
+    """
+    table = _filtered_data_table(start_year, end_year, filters, country)
+    # Written straight into a byte buffer: no intermediate str of the whole file to encode
+    buffer = io.BytesIO()
+    _label_scenarios(table, scenarios).to_csv(buffer, index=False, encoding='utf-8')
+    return buffer.getvalue()
 
 
 def main():
+    # Custom CSS is re-emitted on every rerun; only the minification is cached
+    st.markdown(f"<style>{_minified_css()}</style>", unsafe_allow_html=True)
+    
     # Header
     st.markdown('<p class="main-header">📊 Life Insurance Premium Forecasting Dashboard</p>', 
                 unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Forecasting premiums for the next decade by combining longevity, mortality trends, and economic indicators</p>', 
                 unsafe_allow_html=True)
     
-    # Initialize chat interface
-    initialize_chat()
-    
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -473,36 +847,16 @@ def main():
         
         # Sum Insured selector (for display and calculation reference)
         st.subheader("💰 Sum Insured")
-        sum_insured_options = {
-            "₹10 Lakh": 1000000,
-            "₹25 Lakh": 2500000,
-            "₹50 Lakh": 5000000,
-            "₹1 Crore": 10000000,
-            "₹2 Crore": 20000000,
-            "All": None
-        }
-        # Find the index for sum_insured from chat_params
-        if chat_sum_insured:
-            # Find matching label
-            matching_label = None
-            for label, value in sum_insured_options.items():
-                if value == chat_sum_insured:
-                    matching_label = label
-                    break
-            if matching_label:
-                sum_insured_idx = list(sum_insured_options.keys()).index(matching_label)
-            else:
-                sum_insured_idx = 2  # Default to ₹50 Lakh
-        else:
-            sum_insured_idx = 2  # Default to ₹50 Lakh
+        # Find the index for sum_insured from chat_params, defaulting to ₹50 Lakh
+        sum_insured_idx = SUM_INSURED_IDX_BY_VALUE.get(chat_sum_insured, 2)
         
         selected_sum_insured_label = st.selectbox(
             "Sum Insured (Coverage Amount)",
-            list(sum_insured_options.keys()),
+            SUM_INSURED_LABELS,
             index=sum_insured_idx,
             help="Select the coverage amount to calculate premiums. Premiums are calculated per ₹1 lakh and multiplied by sum insured."
         )
-        selected_sum_insured = sum_insured_options[selected_sum_insured_label]
+        selected_sum_insured = SUM_INSURED_OPTIONS[selected_sum_insured_label]
         
         filter_age_min = st.slider("Minimum Age", 20, 80, default_age_min)
         filter_age_max = st.slider("Maximum Age", 20, 80, default_age_max)
@@ -575,26 +929,23 @@ def main():
         st.error("Failed to initialize forecaster. Please refresh the page.")
         return
     
-    # Floating Chat Button and Window
-    if st.session_state.chat_interface:
+    # Floating Chat Button and Window (the chat client itself is created on first open)
+    if os.getenv("GROQ_API_KEY"):
         # Create columns to position chat button on the right
         col1, col2 = st.columns([0.95, 0.05])
         
         with col2:
             # Chat toggle button (positioned on the right)
-            if st.button("💬", key="chat_toggle", help="Open Chat Assistant", use_container_width=True):
-                st.session_state.chat_open = not st.session_state.chat_open
-                st.rerun()
+            st.button("💬", key="chat_toggle", help="Open Chat Assistant", use_container_width=True,
+                      on_click=toggle_chat)
         
         # Chat window (expander style)
-        if st.session_state.chat_open:
+        if st.session_state.chat_open and st.session_state.chat_interface:
             with st.expander("💬 Chat Assistant", expanded=True):
                 st.info("💡 Try: 'Show forecast for males aged 30-50' or 'Compare all scenarios'")
                 
                 # Display chat history
-                for message in st.session_state.chat_messages[-10:]:  # Show last 10 messages
-                    with st.chat_message(message["role"]):
-                        st.write(message["content"])
+                render_chat_messages(st.session_state.chat_messages[-10:])  # Show last 10 messages
                 
                 # Chat input
                 if prompt := st.chat_input("Ask about premium forecasts...", key="chat_input"):
@@ -606,7 +957,9 @@ def main():
                         try:
                             parsed_params = st.session_state.chat_interface.parse_query(prompt)
                             
-                            # Update sidebar parameters based on chat
+                            # Update sidebar parameters based on chat (the sidebar has
+                            # already rendered, so only a change needs another pass)
+                            params_changed = parsed_params != st.session_state.chat_params
                             st.session_state.chat_params = parsed_params
                             
                             # Generate response
@@ -647,26 +1000,25 @@ def main():
                                 response = "✅ I'll compare all scenarios for you."
                             
                             st.session_state.chat_messages.append({"role": "assistant", "content": response})
-                            st.rerun()
                             
                         except Exception as e:
-                            st.session_state.chat_messages.append({
-                                "role": "assistant", 
-                                "content": f"❌ I had trouble understanding that. Could you rephrase? (Error: {str(e)})"
-                            })
-                            st.rerun()
+                            params_changed = False
+                            response = f"❌ I had trouble understanding that. Could you rephrase? (Error: {str(e)})"
+                            st.session_state.chat_messages.append({"role": "assistant", "content": response})
+                    
+                    if params_changed:
+                        st.rerun()
+                    render_chat_messages(st.session_state.chat_messages[-2:])
                 
                 # Close button
-                if st.button("Close Chat", key="close_chat"):
-                    st.session_state.chat_open = False
-                    st.rerun()
+                st.button("Close Chat", key="close_chat", on_click=close_chat)
     
     # Main content
     if scenario_mode == "Compare All Scenarios":
         # Compare scenarios
         with st.spinner("Generating forecasts for all scenarios..."):
-            comparison_df = st.session_state.forecaster.compare_scenarios(
-                start_year, end_year, selected_country, filters
+            comparison_df = _cached_compare(
+                data_version(), start_year, end_year, selected_country, filters
             )
         
         # Check if comparison_df is valid
@@ -683,11 +1035,14 @@ def main():
                 if st.session_state.forecaster is None:
                     st.error("Forecaster is not initialized!")
                 else:
-                    # Check data availability
-                    mortality_df, economic_df, base_premium_df, demographic_df = load_data()
-                    
                     # Check smoking_status filter
                     if 'smoking_status' in filters and filters['smoking_status']:
+                        # Check data availability on the frames the forecaster already holds
+                        forecaster = st.session_state.forecaster
+                        mortality_df = forecaster.mortality_df
+                        base_premium_df = forecaster.base_premium_df
+                        demographic_df = forecaster.demographic_df
+                        
                         st.write(f"**Smoking Status Filter:** {filters['smoking_status']}")
                         st.write(f"**Base Premiums with {filters['smoking_status']}:**", 
                                 len(base_premium_df[base_premium_df['smoking_status'] == filters['smoking_status']]) if 'smoking_status' in base_premium_df.columns else "Column not found")
@@ -701,280 +1056,80 @@ def main():
             st.error(f"Invalid data structure. Expected 'scenario' column. Available columns: {list(comparison_df.columns)}")
             return
         
+        # Split by scenario once; the charts below look rows up from this dict
+        by_scenario = dict(tuple(comparison_df.groupby('scenario', sort=False, observed=True)))
+        
         # Overview metrics
         st.subheader("📊 Overview Metrics")
         col1, col2, col3, col4 = st.columns(4)
         
-        base_data = comparison_df[comparison_df['scenario'] == 'base']
+        base_data = by_scenario.get('base', comparison_df.iloc[:0])
         if not base_data.empty:
-            current_premium = base_data.iloc[0]['average_premium']
-            final_premium = base_data.iloc[-1]['average_premium']
+            # First and last forecast years, each extracted once
+            first_row = base_data.iloc[0]
+            last_row = base_data.iloc[-1]
+            current_premium = first_row['average_premium']
+            final_premium = last_row['average_premium']
             change_pct = ((final_premium - current_premium) / current_premium) * 100
             
             # Get premium per unit and sum insured if available
-            current_premium_per_unit = base_data.iloc[0].get('average_premium_per_unit', current_premium / 10.0)
-            avg_sum_insured = base_data.iloc[0].get('average_sum_insured', 10000000)  # Default ₹1Cr
+            current_premium_per_unit = first_row.get('average_premium_per_unit', current_premium / 10.0)
+            avg_sum_insured = first_row.get('average_sum_insured', 10000000)  # Default ₹1Cr
             
             col1.metric("Current Premium (Base)", f"₹{current_premium:,.2f}", 
                        help=f"Premium per unit: ₹{current_premium_per_unit:,.2f} per ₹1L | Avg Sum Insured: ₹{avg_sum_insured/100000:.1f}L")
             col2.metric("10-Year Forecast (Base)", f"₹{final_premium:,.2f}",
-                       help=f"Premium per unit: ₹{base_data.iloc[-1].get('average_premium_per_unit', final_premium/10.0):,.2f} per ₹1L")
+                       help=f"Premium per unit: ₹{last_row.get('average_premium_per_unit', final_premium/10.0):,.2f} per ₹1L")
             col3.metric("Change (%)", f"{change_pct:+.1f}%")
-            col4.metric("Total Policies", f"{base_data.iloc[0]['total_policies']:,}")
+            col4.metric("Total Policies", f"{first_row['total_policies']:,}")
         
         # Scenario comparison chart
         st.subheader("📈 Premium Forecast: Scenario Comparison")
         
-        fig = go.Figure()
-        
-        scenarios = comparison_df['scenario'].unique()
-        colors = {'base': '#1f77b4', 'optimistic': '#2ca02c', 'pessimistic': '#d62728'}
-        names = {'base': 'Base Case', 'optimistic': 'Optimistic', 'pessimistic': 'Pessimistic'}
-        
-        for scenario in scenarios:
-            scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-            fig.add_trace(go.Scatter(
-                x=scenario_data['year'],
-                y=scenario_data['average_premium'],
-                mode='lines+markers',
-                name=names[scenario],
-                line=dict(color=colors[scenario], width=3),
-                marker=dict(size=8)
-            ))
-        
-        # Get sum insured info for subtitle
-        sum_insured_info = ""
-        if not comparison_df.empty and 'average_sum_insured' in comparison_df.columns:
-            avg_si = comparison_df['average_sum_insured'].mean()
-            sum_insured_info = f" (Avg Sum Insured: ₹{avg_si/100000:.1f}L)"
-        elif filters.get('_display_sum_insured'):
-            si = filters['_display_sum_insured']
-            sum_insured_info = f" (Sum Insured: ₹{si/100000:.1f}L)"
-        
-        fig.update_layout(
-            title=f"Average Premium Forecast by Scenario{sum_insured_info}",
-            xaxis_title="Year",
-            yaxis_title="Average Premium (₹)",
-            hovermode='x unified',
-            height=500,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        figures = comparison_figures(data_version(), start_year, end_year, selected_country, filters)
+        st.plotly_chart(figures['premium'], use_container_width=True)
         
         # Economic indicators
         st.subheader("💰 Economic Indicators by Scenario")
         
         # Create individual charts with legends at bottom of each
-        scenarios_list = list(scenarios)
-        
         # Create 2x2 grid layout
         chart_col1, chart_col2 = st.columns(2)
         
         with chart_col1:
-            # Inflation Rate Chart
-            fig_inflation = go.Figure()
-            for scenario in scenarios_list:
-                scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                fig_inflation.add_trace(
-                    go.Scatter(x=scenario_data['year'], y=scenario_data['inflation_rate'],
-                              name=names[scenario], 
-                              line=dict(color=colors[scenario], width=2),
-                              mode='lines+markers',
-                              marker=dict(size=6))
-                )
-            fig_inflation.update_layout(
-                title=dict(text="Inflation Rate", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                xaxis_title="Year",
-                yaxis_title="Rate (%)",
-                height=420,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.01,
-                    xanchor="center",
-                    x=0.5,
-                    bgcolor='rgba(255,255,255,0.95)',
-                    bordercolor='rgba(0,0,0,0.3)',
-                    borderwidth=1,
-                    font=dict(size=10)
-                ),
-                margin=dict(t=80, b=60, l=60, r=50)
-            )
-            st.plotly_chart(fig_inflation, use_container_width=True)
-            
-            # GDP Growth Chart
-            fig_gdp = go.Figure()
-            for scenario in scenarios_list:
-                scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                fig_gdp.add_trace(
-                    go.Scatter(x=scenario_data['year'], y=scenario_data['gdp_growth'],
-                              name=names[scenario], 
-                              line=dict(color=colors[scenario], width=2),
-                              mode='lines+markers',
-                              marker=dict(size=6))
-                )
-            fig_gdp.update_layout(
-                title=dict(text="GDP Growth", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                xaxis_title="Year",
-                yaxis_title="Rate (%)",
-                height=420,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.01,
-                    xanchor="center",
-                    x=0.5,
-                    bgcolor='rgba(255,255,255,0.95)',
-                    bordercolor='rgba(0,0,0,0.3)',
-                    borderwidth=1,
-                    font=dict(size=10)
-                ),
-                margin=dict(t=80, b=60, l=60, r=50)
-            )
-            st.plotly_chart(fig_gdp, use_container_width=True)
+            st.plotly_chart(figures['inflation'], use_container_width=True)
+            st.plotly_chart(figures['gdp'], use_container_width=True)
         
         with chart_col2:
-            # Interest Rate Chart
-            fig_interest = go.Figure()
-            for scenario in scenarios_list:
-                scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                fig_interest.add_trace(
-                    go.Scatter(x=scenario_data['year'], y=scenario_data['interest_rate'],
-                              name=names[scenario], 
-                              line=dict(color=colors[scenario], width=2),
-                              mode='lines+markers',
-                              marker=dict(size=6))
-                )
-            fig_interest.update_layout(
-                title=dict(text="Interest Rate", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                xaxis_title="Year",
-                yaxis_title="Rate (%)",
-                height=420,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.01,
-                    xanchor="center",
-                    x=0.5,
-                    bgcolor='rgba(255,255,255,0.95)',
-                    bordercolor='rgba(0,0,0,0.3)',
-                    borderwidth=1,
-                    font=dict(size=10)
-                ),
-                margin=dict(t=80, b=60, l=60, r=50)
-            )
-            st.plotly_chart(fig_interest, use_container_width=True)
-            
-            # Premium vs Interest Rate Chart
-            fig_premium_interest = go.Figure()
-            for scenario in scenarios_list:
-                scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                fig_premium_interest.add_trace(
-                    go.Scatter(x=scenario_data['interest_rate'], y=scenario_data['average_premium'],
-                              name=names[scenario], 
-                              mode='markers',
-                              marker=dict(color=colors[scenario], size=8))
-                )
-            fig_premium_interest.update_layout(
-                title=dict(text="Premium vs Interest Rate", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                xaxis_title="Interest Rate (%)",
-                yaxis_title="Premium (₹)",
-                height=420,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.01,
-                    xanchor="center",
-                    x=0.5,
-                    bgcolor='rgba(255,255,255,0.95)',
-                    bordercolor='rgba(0,0,0,0.3)',
-                    borderwidth=1,
-                    font=dict(size=10)
-                ),
-                margin=dict(t=80, b=60, l=60, r=50)
-            )
-            st.plotly_chart(fig_premium_interest, use_container_width=True)
+            st.plotly_chart(figures['interest'], use_container_width=True)
+            st.plotly_chart(figures['premium_interest'], use_container_width=True)
         
         # Mortality & Longevity Trends by Scenario
-        if 'average_mortality_rate' in comparison_df.columns and 'average_life_expectancy' in comparison_df.columns:
+        if 'mortality' in figures:
             st.subheader("📉 Mortality & Longevity Trends by Scenario")
             
             # Create individual charts with legends at top of each
             longevity_col1, longevity_col2 = st.columns(2)
             
             with longevity_col1:
-                # Mortality Rate Chart
-                fig_mortality = go.Figure()
-                for scenario in scenarios_list:
-                    scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                    fig_mortality.add_trace(
-                        go.Scatter(x=scenario_data['year'], y=scenario_data['average_mortality_rate'],
-                                  name=names[scenario], 
-                                  line=dict(color=colors[scenario], width=2),
-                                  mode='lines+markers',
-                                  marker=dict(size=6))
-                    )
-                fig_mortality.update_layout(
-                    title=dict(text="Mortality Rate Trend", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                    xaxis_title="Year",
-                    yaxis_title="Mortality Rate (per 1000)",
-                    height=470,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.01,
-                        xanchor="center",
-                        x=0.5,
-                        bgcolor='rgba(255,255,255,0.95)',
-                        bordercolor='rgba(0,0,0,0.3)',
-                        borderwidth=1,
-                        font=dict(size=10)
-                    ),
-                    margin=dict(t=80, b=60, l=60, r=50)
-                )
-                st.plotly_chart(fig_mortality, use_container_width=True)
+                st.plotly_chart(figures['mortality'], use_container_width=True)
             
             with longevity_col2:
-                # Life Expectancy Chart
-                fig_life_expectancy = go.Figure()
-                for scenario in scenarios_list:
-                    scenario_data = comparison_df[comparison_df['scenario'] == scenario]
-                    fig_life_expectancy.add_trace(
-                        go.Scatter(x=scenario_data['year'], y=scenario_data['average_life_expectancy'],
-                                  name=names[scenario], 
-                                  line=dict(color=colors[scenario], width=2),
-                                  mode='lines+markers',
-                                  marker=dict(size=6))
-                    )
-                fig_life_expectancy.update_layout(
-                    title=dict(text="Life Expectancy Trend", y=0.97, x=0.5, xanchor='center', yanchor='top'),
-                    xaxis_title="Year",
-                    yaxis_title="Life Expectancy (years)",
-                    height=470,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.01,
-                        xanchor="center",
-                        x=0.5,
-                        bgcolor='rgba(255,255,255,0.95)',
-                        bordercolor='rgba(0,0,0,0.3)',
-                        borderwidth=1,
-                        font=dict(size=10)
-                    ),
-                    margin=dict(t=80, b=60, l=60, r=50)
-                )
-                st.plotly_chart(fig_life_expectancy, use_container_width=True)
+                st.plotly_chart(figures['life_expectancy'], use_container_width=True)
         
         # AI Insights - Enhanced
         if st.session_state.insights_generator:
             st.subheader("🤖 AI-Powered Insights")
             
+            # Scenario comparison is requested up front; recommendations stream below
+            with st.spinner("Generating AI insights..."):
+                insights = run_async(st.session_state.insights_generator.generate_all(
+                    comparison_df=comparison_df, filters=filters, include_recommendations=False
+                ))
+            comparison_result = insights['comparison']
+            
             # Key Metrics Cards
             with st.expander("📊 Key Metrics", expanded=True):
-                comparison_result = st.session_state.insights_generator.generate_scenario_comparison(comparison_df, filters)
-                
                 if isinstance(comparison_result, dict) and 'premium_range' in comparison_result:
                     col1, col2, col3, col4 = st.columns(4)
                     
@@ -1011,123 +1166,74 @@ def main():
             
             # Scenario Comparison Analysis
             with st.expander("📝 Detailed Scenario Analysis", expanded=True):
-                with st.spinner("Generating comprehensive analysis..."):
-                    if isinstance(comparison_result, dict):
-                        st.markdown(comparison_result.get('analysis', 'Analysis not available'))
+                # comparison_result was generated once above; this only renders it
+                if isinstance(comparison_result, dict):
+                    st.markdown(comparison_result.get('analysis', 'Analysis not available'))
+                    
+                    # Show scenario details
+                    if 'scenarios' in comparison_result:
+                        st.markdown("### 📈 Scenario Details")
+                        scenario_display = scenario_detail_metrics(comparison_result['scenarios'])
+                        scenario_tabs = st.tabs([label for label, _ in scenario_display])
                         
-                        # Show scenario details
-                        if 'scenarios' in comparison_result:
-                            st.markdown("### 📈 Scenario Details")
-                            scenario_tabs = st.tabs([s.title() for s in comparison_result['scenarios'].keys()])
-                            
-                            for idx, (scenario, details) in enumerate(comparison_result['scenarios'].items()):
-                                with scenario_tabs[idx]:
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        st.metric("Starting Premium", f"₹{details['start_premium']:,.2f}")
-                                        st.metric("Ending Premium", f"₹{details['end_premium']:,.2f}")
-                                        st.metric("Total Change", f"{details['change_pct']:+.1f}%")
-                                    with col2:
-                                        st.metric("Avg Inflation", f"{details['avg_inflation']:.2f}%")
-                                        st.metric("Avg Interest Rate", f"{details['avg_interest']:.2f}%")
-                                        st.metric("Premium Volatility", f"{details.get('volatility', 0):.2f}%")
-                    else:
-                        st.write(comparison_result)
+                        for tab, (_, columns) in zip(scenario_tabs, scenario_display):
+                            with tab:
+                                for col, metrics in zip(st.columns(2), columns):
+                                    with col:
+                                        for label, value in metrics:
+                                            st.metric(label, value)
+                else:
+                    st.write(comparison_result)
             
             # Recommendations
             with st.expander("💡 Strategic Recommendations", expanded=True):
-                with st.spinner("Generating recommendations..."):
-                    recommendations_result = st.session_state.insights_generator.generate_recommendations(comparison_df, filters)
-                    
-                    if isinstance(recommendations_result, dict):
-                        st.markdown(recommendations_result.get('recommendations', 'Recommendations not available'))
-                        
-                        # Show key metrics
-                        if 'metrics' in recommendations_result:
-                            st.markdown("### 📊 Recommendation Metrics")
-                            metrics = recommendations_result['metrics']
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.metric("Avg Premium Increase", f"{metrics['avg_premium_increase']:.1f}%")
-                            with col2:
-                                st.metric("Premium Spread", f"{metrics['spread_pct']:.1f}%")
-                    else:
-                        st.write(recommendations_result)
+                st.write_stream(st.session_state.insights_generator.stream_recommendations(comparison_df, filters))
+                
+                # Show key metrics
+                recommendations_result = st.session_state.insights_generator.get_recommendation_metrics(comparison_df)
+                st.markdown("### 📊 Recommendation Metrics")
+                metrics = recommendations_result['metrics']
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Avg Premium Increase", f"{metrics['avg_premium_increase']:.1f}%")
+                with col2:
+                    st.metric("Premium Spread", f"{metrics['spread_pct']:.1f}%")
             
-            # Driver Impact Analysis
-            with st.expander("🔍 Driver Impact Analysis", expanded=False):
-                base_data = comparison_df[comparison_df['scenario'] == 'base']
-                if not base_data.empty:
+            # Driver Impact Analysis (collapsed panels track their state and only
+            # compute their body while open)
+            with st.expander("🔍 Driver Impact Analysis", expanded=False,
+                             key="compare_drivers_open", on_change="rerun") as drivers_panel:
+                # base_data is the base-scenario slice taken for the overview metrics
+                if drivers_panel.open and not base_data.empty:
                     driver_impact = st.session_state.insights_generator.calculate_driver_impact(base_data)
                     
                     if driver_impact and 'drivers' in driver_impact:
                         st.markdown(f"**Total Premium Change: {driver_impact['total_premium_change_pct']:+.1f}%**")
                         st.markdown("### Factor Impact on Premiums")
                         
-                        for driver_name, driver_data in driver_impact['drivers'].items():
-                            col1, col2, col3 = st.columns([2, 1, 1])
-                            with col1:
-                                st.write(f"**{driver_name.replace('_', ' ').title()}**")
-                            with col2:
-                                corr = driver_data['correlation']
-                                st.write(f"Correlation: {corr:+.2f}")
-                            with col3:
-                                impact_level = driver_data['impact']
-                                color = "🔴" if impact_level == "High" else "🟡" if impact_level == "Medium" else "🟢"
-                                st.write(f"{color} {impact_level} Impact")
+                        st.dataframe(driver_impact_table(driver_impact['drivers']),
+                                     hide_index=True, use_container_width=True)
         
         # Comprehensive Data Table
         st.subheader("📊 Comprehensive Data Table")
         st.markdown("**All data from CSVs filtered by your selections**")
         
-        # Get raw data
-        mortality_df, economic_df, base_premium_df, demographic_df = load_data()
+        # The rows do not depend on the scenario, so the table is built once and
+        # repeated per scenario label (see display_data_table)
+        display_table = display_data_table(start_year, end_year, filters, selected_country,
+                                           ('base', 'optimistic', 'pessimistic'))
         
-        # Prepare filtered data table for each scenario
-        all_data_tables = []
-        for scenario in ['base', 'optimistic', 'pessimistic']:
-            scenario_data = prepare_filtered_data_table(
-                mortality_df, economic_df, base_premium_df, demographic_df,
-                start_year, end_year, filters, selected_country, scenario
-            )
-            if not scenario_data.empty:
-                all_data_tables.append(scenario_data)
-        
-        if all_data_tables:
-            combined_table = pd.concat(all_data_tables, ignore_index=True)
-            
-            # Sort by scenario, year, age, gender
-            sort_cols = ['scenario', 'year', 'age', 'gender', 'group', 'policy_type']
-            if 'smoking_status' in combined_table.columns:
-                sort_cols.insert(-1, 'smoking_status')
-            combined_table = combined_table.sort_values(sort_cols)
-            
-            # Format numeric columns for display
-            display_table = combined_table.copy()
-            
-            # Format premium columns
-            if 'base_premium' in display_table.columns:
-                display_table['base_premium'] = display_table['base_premium'].apply(lambda x: f"₹{x:,.2f}")
-            if 'premium_per_unit' in display_table.columns:
-                display_table['premium_per_unit'] = display_table['premium_per_unit'].apply(lambda x: f"₹{x:,.2f}")
-            if 'sum_insured' in display_table.columns:
-                display_table['sum_insured'] = display_table['sum_insured'].apply(lambda x: f"₹{x/100000:.1f}L" if x < 10000000 else f"₹{x/10000000:.1f}Cr")
-            
-            display_table['mortality_rate'] = display_table['mortality_rate'].apply(lambda x: f"{x:.4f}")
-            display_table['life_expectancy'] = display_table['life_expectancy'].apply(lambda x: f"{x:.1f}")
-            display_table['inflation_rate'] = display_table['inflation_rate'].apply(lambda x: f"{x:.2f}%")
-            display_table['interest_rate'] = display_table['interest_rate'].apply(lambda x: f"{x:.2f}%")
-            display_table['gdp_growth'] = display_table['gdp_growth'].apply(lambda x: f"{x:.2f}%")
-            
+        if not display_table.empty:
             st.dataframe(display_table, use_container_width=True, height=400)
             
             # Download button
-            csv = combined_table.to_csv(index=False)
             st.download_button(
                 label="📥 Download Data as CSV",
-                data=csv,
+                data=partial(data_table_csv, start_year, end_year, filters, selected_country,
+                             ('base', 'optimistic', 'pessimistic')),
                 file_name=f"premium_forecast_data_{start_year}_{end_year}.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"  # Downloading changes nothing on the page: skip the rerun
             )
         else:
             st.info("No data available for the selected filters.")
@@ -1139,8 +1245,8 @@ def main():
     else:
         # Single scenario view
         with st.spinner(f"Generating forecast for {selected_scenario} scenario..."):
-            forecast_df = st.session_state.forecaster.forecast_average_premium(
-                start_year, end_year, selected_scenario, selected_country, filters
+            forecast_df = _cached_forecast(
+                data_version(), start_year, end_year, selected_scenario, selected_country, filters
             )
         
         if forecast_df.empty:
@@ -1151,19 +1257,32 @@ def main():
         st.subheader("📊 Overview Metrics")
         col1, col2, col3, col4 = st.columns(4)
         
-        current_premium = forecast_df.iloc[0]['average_premium']
-        final_premium = forecast_df.iloc[-1]['average_premium']
+        # All summary scalars in one place: first and last rows are extracted once and
+        # the charts below reuse these instead of rescanning forecast_df
+        first_row = forecast_df.iloc[0]
+        last_row = forecast_df.iloc[-1]
+        current_premium = first_row['average_premium']
+        final_premium = last_row['average_premium']
         change_pct = ((final_premium - current_premium) / current_premium) * 100
         avg_inflation = forecast_df['inflation_rate'].mean()
         
         # Get premium per unit and sum insured if available
-        current_premium_per_unit = forecast_df.iloc[0].get('average_premium_per_unit', current_premium / 10.0)
-        avg_sum_insured = forecast_df.iloc[0].get('average_sum_insured', filters.get('_display_sum_insured', 10000000))
+        current_premium_per_unit = first_row.get('average_premium_per_unit', current_premium / 10.0)
+        final_premium_per_unit = last_row.get('average_premium_per_unit', final_premium / 10.0)
+        avg_sum_insured = first_row.get('average_sum_insured', filters.get('_display_sum_insured', 10000000))
+        
+        sum_insured_info = ""
+        if 'average_sum_insured' in forecast_df.columns:
+            avg_si = forecast_df['average_sum_insured'].mean()
+            sum_insured_info = f" (Avg Sum Insured: ₹{avg_si/100000:.1f}L)"
+        elif filters.get('_display_sum_insured'):
+            si = filters['_display_sum_insured']
+            sum_insured_info = f" (Sum Insured: ₹{si/100000:.1f}L)"
         
         col1.metric("Current Premium", f"₹{current_premium:,.2f}",
                    help=f"Premium per ₹1L: ₹{current_premium_per_unit:,.2f} | Sum Insured: ₹{avg_sum_insured/100000:.1f}L")
         col2.metric("10-Year Forecast", f"₹{final_premium:,.2f}",
-                   help=f"Premium per ₹1L: ₹{forecast_df.iloc[-1].get('average_premium_per_unit', final_premium/10.0):,.2f}")
+                   help=f"Premium per ₹1L: ₹{final_premium_per_unit:,.2f}")
         col3.metric("Total Change", f"{change_pct:+.1f}%")
         col4.metric("Avg Inflation", f"{avg_inflation:.2f}%")
         
@@ -1182,15 +1301,6 @@ def main():
             fillcolor='rgba(31, 119, 180, 0.1)'
         ))
         
-        # Get sum insured info for subtitle
-        sum_insured_info = ""
-        if 'average_sum_insured' in forecast_df.columns:
-            avg_si = forecast_df['average_sum_insured'].mean()
-            sum_insured_info = f" (Avg Sum Insured: ₹{avg_si/100000:.1f}L)"
-        elif filters.get('_display_sum_insured'):
-            si = filters['_display_sum_insured']
-            sum_insured_info = f" (Sum Insured: ₹{si/100000:.1f}L)"
-        
         fig.update_layout(
             title=f"Average Premium Forecast - {selected_scenario.title()} Scenario{sum_insured_info}",
             xaxis_title="Year",
@@ -1300,11 +1410,11 @@ def main():
                                       title_text="Longevity Improvements: Lower Mortality, Higher Life Expectancy")
             st.plotly_chart(fig_longevity, use_container_width=True)
             
-            # Key insight
-            mortality_change = ((forecast_df.iloc[-1]['average_mortality_rate'] - 
-                               forecast_df.iloc[0]['average_mortality_rate']) / 
-                              forecast_df.iloc[0]['average_mortality_rate']) * 100
-            life_exp_change = forecast_df.iloc[-1]['average_life_expectancy'] - forecast_df.iloc[0]['average_life_expectancy']
+            # Key insight (positional reads on the raw column arrays)
+            mortality = forecast_df['average_mortality_rate'].to_numpy()
+            life_exp = forecast_df['average_life_expectancy'].to_numpy()
+            mortality_change = ((mortality[-1] - mortality[0]) / mortality[0]) * 100
+            life_exp_change = life_exp[-1] - life_exp[0]
             
             col1, col2 = st.columns(2)
             with col1:
@@ -1318,6 +1428,14 @@ def main():
         if st.session_state.insights_generator:
             st.subheader("🤖 AI-Powered Insights")
             
+            # Summary and driver analysis come back from one combined request (each
+            # falls back to its own call if the reply is unusable); recommendations stream below
+            with st.spinner("Generating AI insights..."):
+                insights = st.session_state.insights_generator.generate_full_report(
+                    forecast_df, scenario_name=selected_scenario, filters=filters,
+                    include_recommendations=False
+                )
+            
             # Key Metrics
             with st.expander("📊 Key Metrics", expanded=True):
                 col1, col2, col3, col4 = st.columns(4)
@@ -1332,97 +1450,52 @@ def main():
             
             # Forecast Summary
             with st.expander("📝 Forecast Summary", expanded=True):
-                with st.spinner("Generating forecast analysis..."):
-                    summary = st.session_state.insights_generator.generate_forecast_summary(
-                        forecast_df, selected_scenario
-                    )
-                    st.markdown(summary)
+                st.markdown(insights['summary'])
             
-            # Driver Analysis
-            with st.expander("🔍 Driver Impact Analysis", expanded=False):
-                driver_impact = st.session_state.insights_generator.calculate_driver_impact(forecast_df)
-                
-                if driver_impact and 'drivers' in driver_impact:
-                    st.markdown(f"**Total Premium Change: {driver_impact['total_premium_change_pct']:+.1f}%**")
-                    st.markdown("### Factor Impact on Premiums")
+            # Driver Analysis (collapsed panels track their state and only compute
+            # their body while open)
+            with st.expander("🔍 Driver Impact Analysis", expanded=False,
+                             key="single_drivers_open", on_change="rerun") as drivers_panel:
+                if drivers_panel.open:
+                    driver_impact = st.session_state.insights_generator.calculate_driver_impact(forecast_df)
                     
-                    for driver_name, driver_data in driver_impact['drivers'].items():
-                        col1, col2, col3 = st.columns([2, 1, 1])
-                        with col1:
-                            st.write(f"**{driver_name.replace('_', ' ').title()}**")
-                        with col2:
-                            corr = driver_data['correlation']
-                            st.write(f"Correlation: {corr:+.2f}")
-                        with col3:
-                            impact_level = driver_data['impact']
-                            color = "🔴" if impact_level == "High" else "🟡" if impact_level == "Medium" else "🟢"
-                            st.write(f"{color} {impact_level} Impact")
-                
-                # Also show detailed driver analysis
-                with st.spinner("Analyzing drivers..."):
-                    driver_analysis = st.session_state.insights_generator.generate_driver_analysis(
-                        forecast_df, selected_scenario, filters
-                    )
-                    st.markdown(driver_analysis)
+                    if driver_impact and 'drivers' in driver_impact:
+                        st.markdown(f"**Total Premium Change: {driver_impact['total_premium_change_pct']:+.1f}%**")
+                        st.markdown("### Factor Impact on Premiums")
+                        
+                        st.dataframe(driver_impact_table(driver_impact['drivers']),
+                                     hide_index=True, use_container_width=True)
+                    
+                    # Also show detailed driver analysis
+                    st.markdown(insights['driver_analysis'])
             
             # Recommendations
-            with st.expander("💡 Recommendations", expanded=False):
-                with st.spinner("Generating recommendations..."):
-                    # Create a comparison df with just this scenario for recommendations
-                    single_scenario_df = forecast_df.copy()
-                    recommendations = st.session_state.insights_generator.generate_recommendations(single_scenario_df, filters)
-                    
-                    if isinstance(recommendations, dict):
-                        st.markdown(recommendations.get('recommendations', 'Recommendations not available'))
-                    else:
-                        st.write(recommendations)
+            with st.expander("💡 Recommendations", expanded=False,
+                             key="single_recommendations_open", on_change="rerun") as recommendations_panel:
+                # Recommendations are based on this single scenario's forecast; the
+                # LLM is only asked while the panel is open
+                if recommendations_panel.open:
+                    st.write_stream(st.session_state.insights_generator.stream_recommendations(forecast_df, filters))
         
         # Comprehensive Data Table
         st.subheader("📊 Comprehensive Data Table")
         st.markdown("**All data from CSVs filtered by your selections**")
         
-        # Get raw data
-        mortality_df, economic_df, base_premium_df, demographic_df = load_data()
+        # Formatted data table, already sorted by year, age, gender, ... (see _filtered_data_table)
+        display_table = display_data_table(start_year, end_year, filters, selected_country,
+                                           (selected_scenario,))
         
-        # Prepare filtered data table
-        filtered_table = prepare_filtered_data_table(
-            mortality_df, economic_df, base_premium_df, demographic_df,
-            start_year, end_year, filters, selected_country, selected_scenario
-        )
-        
-        if not filtered_table.empty:
-            # Sort by year, age, gender
-            sort_cols = ['year', 'age', 'gender', 'group', 'policy_type']
-            if 'smoking_status' in filtered_table.columns:
-                sort_cols.insert(-1, 'smoking_status')
-            filtered_table = filtered_table.sort_values(sort_cols)
-            
-            # Format numeric columns for display
-            display_table = filtered_table.copy()
-            
-            # Format premium columns
-            if 'base_premium' in display_table.columns:
-                display_table['base_premium'] = display_table['base_premium'].apply(lambda x: f"₹{x:,.2f}")
-            if 'premium_per_unit' in display_table.columns:
-                display_table['premium_per_unit'] = display_table['premium_per_unit'].apply(lambda x: f"₹{x:,.2f}")
-            if 'sum_insured' in display_table.columns:
-                display_table['sum_insured'] = display_table['sum_insured'].apply(lambda x: f"₹{x/100000:.1f}L" if x < 10000000 else f"₹{x/10000000:.1f}Cr")
-            
-            display_table['mortality_rate'] = display_table['mortality_rate'].apply(lambda x: f"{x:.4f}")
-            display_table['life_expectancy'] = display_table['life_expectancy'].apply(lambda x: f"{x:.1f}")
-            display_table['inflation_rate'] = display_table['inflation_rate'].apply(lambda x: f"{x:.2f}%")
-            display_table['interest_rate'] = display_table['interest_rate'].apply(lambda x: f"{x:.2f}%")
-            display_table['gdp_growth'] = display_table['gdp_growth'].apply(lambda x: f"{x:.2f}%")
-            
+        if not display_table.empty:
             st.dataframe(display_table, use_container_width=True, height=400)
             
             # Download button
-            csv = filtered_table.to_csv(index=False)
             st.download_button(
                 label="📥 Download Data as CSV",
-                data=csv,
+                data=partial(data_table_csv, start_year, end_year, filters, selected_country,
+                             (selected_scenario,)),
                 file_name=f"premium_forecast_data_{selected_scenario}_{start_year}_{end_year}.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"  # Downloading changes nothing on the page: skip the rerun
             )
         else:
             st.info("No data available for the selected filters.")
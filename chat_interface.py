@@ -11,31 +11,17 @@ from langchain_core.messages import HumanMessage, SystemMessage
 
 load_dotenv()
 
+_JSON_DECODER = json.JSONDecoder()
 
-class DashboardChatInterface:
-    """Process natural language queries and extract dashboard parameters"""
-    
-    def __init__(self, model_name: str = None):
-        """Initialize Groq LLM for chat interface"""
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not found in environment variables")
-        
-        if model_name is None:
-            model_name = os.getenv("GROQ_MODEL_NAME", "mixtral-8x7b-32768")
-        
-        self.llm = ChatGroq(
-            groq_api_key=api_key,
-            model_name=model_name,
-            temperature=0.3  # Lower temperature for more consistent parsing
-        )
-    
-    def parse_query(self, user_query: str) -> Dict:
-        """
-        Parse natural language query and extract dashboard parameters.
-        Returns a dictionary with extracted parameters.
-        """
-        system_prompt = """You are a helpful assistant that extracts parameters from user queries about life insurance premium forecasting.
+# Query parsing patterns, compiled once at import rather than looked up per call
+_CRORE_RE = re.compile(r'(\d+)\s*(?:crore|cr|crores)')
+_LAKH_RE = re.compile(r'(\d+)\s*(?:lakh|l|lakhs)')
+_AGE_RANGE_RE = re.compile(r'age[ds]?\s*(\d+)[\s-]+(\d+)')
+_AGE_SINGLE_RE = re.compile(r'age[ds]?\s*(\d+)')
+_YEAR_RANGE_RE = re.compile(r'(\d{4})[-\s]+(\d{4})')
+
+# System message for parse_query; the same for every query, so built once
+_PARSE_SYSTEM_MESSAGE = SystemMessage(content="""You are a helpful assistant that extracts parameters from user queries about life insurance premium forecasting.
 
 Available parameters:
 - start_year: Year to start forecast (default: 2024)
@@ -69,34 +55,52 @@ Examples:
 - "Show optimistic scenario" → {"scenario": "optimistic"}
 - "forecast for males age 30 years with sum insured 1cr, policy type whole life with non smoker" → {"gender": "Male", "age_min": 30, "age_max": 30, "sum_insured": 10000000, "policy_type": "Whole Life", "smoking_status": "Non-Smoker"}
 
-Return ONLY valid JSON, no other text."""
+Return ONLY valid JSON, no other text.""")
+
 
+class DashboardChatInterface:
+    """Process natural language queries and extract dashboard parameters"""
+    
+    def __init__(self, model_name: str = None):
+        """Initialize Groq LLM for chat interface"""
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise ValueError("GROQ_API_KEY not found in environment variables")
+        
+        if model_name is None:
+            model_name = os.getenv("GROQ_MODEL_NAME", "mixtral-8x7b-32768")
+        
+        self.llm = ChatGroq(
+            groq_api_key=api_key,
+            model_name=model_name,
+            temperature=0.3  # Lower temperature for more consistent parsing
+        )
+    
+    def parse_query(self, user_query: str) -> Dict:
+        """
+        Parse natural language query and extract dashboard parameters.
+        Returns a dictionary with extracted parameters.
+        """
         prompt = f"""Extract parameters from this query: "{user_query}"
 
 Return JSON with only mentioned parameters. Use null for scenario if user wants to compare all scenarios."""
 
         try:
             response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
+                _PARSE_SYSTEM_MESSAGE,
                 HumanMessage(content=prompt)
             ])
             
             # Extract JSON from response
             content = response.content.strip()
             
-            # Try to find JSON in the response
-            json_match = re.search(r'\{[^}]+\}', content)
-            if json_match:
-                import json
-                params = json.loads(json_match.group())
-                return params
-            else:
-                # Fallback: try to parse the entire response as JSON
-                import json
-                params = json.loads(content)
-                return params
+            # Decode the first JSON object in the response, nested braces included;
+            # without any '{' the entire response is parsed as JSON
+            start = content.find('{')
+            params, _ = _JSON_DECODER.raw_decode(content, max(start, 0))
+            return params
                 
-        except Exception as e:
+        except Exception:
             # Fallback parsing with regex
             return self._fallback_parse(user_query)
     
@@ -143,34 +147,32 @@ Return JSON with only mentioned parameters. Use null for scenario if user wants
         
         # Extract sum insured
         # Check for crore first (larger amounts)
-        crore_match = re.search(r'(\d+)\s*(?:crore|cr|crores)', query_lower)
+        crore_match = _CRORE_RE.search(query_lower)
         if crore_match:
             crore_value = int(crore_match.group(1))
             params['sum_insured'] = crore_value * 10000000
         else:
             # Check for lakh
-            lakh_match = re.search(r'(\d+)\s*(?:lakh|l|lakhs)', query_lower)
+            lakh_match = _LAKH_RE.search(query_lower)
             if lakh_match:
                 lakh_value = int(lakh_match.group(1))
                 params['sum_insured'] = lakh_value * 100000
         
         # Extract age range
-        age_pattern = r'age[ds]?\s*(\d+)[\s-]+(\d+)'
-        age_match = re.search(age_pattern, query_lower)
+        age_match = _AGE_RANGE_RE.search(query_lower)
         if age_match:
             params['age_min'] = int(age_match.group(1))
             params['age_max'] = int(age_match.group(2))
         else:
             # Single age
-            age_single = re.search(r'age[ds]?\s*(\d+)', query_lower)
+            age_single = _AGE_SINGLE_RE.search(query_lower)
             if age_single:
                 age = int(age_single.group(1))
                 params['age_min'] = max(20, age - 5)
                 params['age_max'] = min(80, age + 5)
         
         # Extract years
-        year_pattern = r'(\d{4})[-\s]+(\d{4})'
-        year_match = re.search(year_pattern, query)
+        year_match = _YEAR_RANGE_RE.search(query)
         if year_match:
             params['start_year'] = int(year_match.group(1))
             params['end_year'] = int(year_match.group(2))
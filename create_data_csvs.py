@@ -6,6 +6,50 @@ import numpy as np
 import os
 from datetime import datetime
 
+# Column types of the data files as the dashboard loads them (unused columns are skipped)
+CSV_DTYPES = {
+    'year': 'int16', 'age': 'int8', 'policy_count': 'int32',
+    'country': 'category', 'gender': 'category', 'group': 'category',
+    'policy_type': 'category', 'smoking_status': 'category'
+}
+
+
+def _save(df, data_dir, file_name):
+    """
+    Write df as a CSV plus a typed Parquet copy next to it.
+    
+    The dashboard reads the Parquet copy when it is at least as new as the
+    CSV, so the first load after generation skips CSV parsing. Without a
+    Parquet engine only the CSV is written.
+    """
+    csv_path = os.path.join(data_dir, file_name)
+    df.to_csv(csv_path, index=False)
+    try:
+        df.astype({col: dtype for col, dtype in CSV_DTYPES.items() if col in df.columns}).to_parquet(
+            os.path.splitext(csv_path)[0] + '.parquet', index=False, compression='zstd'
+        )
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _round(values, ndigits):
+    """Python's round() over an array; np.round scales by 10**ndigits first, which
+    resolves ties such as 40.85 differently and would change the generated files"""
+    return np.array([round(v, ndigits) for v in values.tolist()])
+
+
+def _cartesian(**axes):
+    """
+    Cartesian product of the axes as flat value arrays, one per keyword.
+    
+    Rows follow the keyword order with the last axis varying fastest, the same
+    order as nested for-loops over the axes.
+    """
+    values = [np.asarray(list(axis)) for axis in axes.values()]
+    grids = np.meshgrid(*(np.arange(len(axis)) for axis in values), indexing='ij')
+    return {name: axis[grid.ravel()] for name, axis, grid in zip(axes, values, grids)}
+
+
 def generate_data(data_dir='data'):
     """
     Generate all CSV data files for the premium forecasting dashboard.
@@ -23,66 +67,59 @@ def generate_data(data_dir='data'):
     
     # 1. Generate Mortality Data (2014-2024)
     print("1. Generating mortality data...")
-    mortality_data = []
     years = list(range(2014, 2025))
     ages = list(range(20, 81, 5))
     genders = ['Male', 'Female']
     smoking_statuses = ['Smoker', 'Non-Smoker']
     
+    # One row per (year, gender, age, smoking status) in that nesting order, computed
+    # as whole-array expressions over the flattened grid
+    grid = _cartesian(year=years, gender=genders, age=ages, smoking_status=smoking_statuses)
+    year_grid, gender_col, age_grid, smoking_col = grid.values()
+    is_male = gender_col == 'Male'
+    is_smoker = smoking_col == 'Smoker'
+    
     # India-specific mortality rates (per 1000) - realistic values
     # Base mortality increases with age, higher for males, much higher for smokers
-    for year in years:
-        for gender in genders:
-            for age in ages:
-                for smoking_status in smoking_statuses:
-                    # Base mortality rate (higher for males, increases with age)
-                    if gender == 'Male':
-                        base_rate = 0.8 * (1.12 ** ((age - 20) / 10))
-                    else:
-                        base_rate = 0.6 * (1.10 ** ((age - 20) / 10))
-                    
-                    # Smoking multiplier: Smokers have 2.5-3x higher mortality
-                    if smoking_status == 'Smoker':
-                        smoking_multiplier = 2.5 + (age - 20) * 0.02  # Higher multiplier for older smokers
-                    else:
-                        smoking_multiplier = 1.0
-                    
-                    # India-specific adjustment (higher mortality than developed countries)
-                    india_multiplier = 1.15
-                    
-                    # Mortality improvement over time (1-2% annual reduction)
-                    years_from_2014 = year - 2014
-                    improvement = (0.985 ** years_from_2014)
-                    
-                    mortality_rate = base_rate * smoking_multiplier * india_multiplier * improvement
-                    
-                    # Life expectancy calculation (India-specific)
-                    # Smokers have 8-12 years lower life expectancy
-                    if gender == 'Male':
-                        base_life_exp = max(68 - age, 0) * 0.95
-                    else:
-                        base_life_exp = max(70 - age, 0) * 0.95
-                    
-                    # Smoking reduces life expectancy
-                    if smoking_status == 'Smoker':
-                        life_expectancy_reduction = 10 - (age - 20) * 0.1  # More impact at younger ages
-                        base_life_exp = max(0, base_life_exp - life_expectancy_reduction)
-                    
-                    # Improving over time
-                    life_expectancy = base_life_exp + (years_from_2014 * 0.15)
-                    
-                    mortality_data.append({
-                        'year': year,
-                        'country': 'India',
-                        'gender': gender,
-                        'age': age,
-                        'smoking_status': smoking_status,
-                        'mortality_rate': round(mortality_rate, 4),
-                        'life_expectancy': round(max(life_expectancy, 0), 1)
-                    })
+    base_rate = np.where(is_male,
+                         0.8 * (1.12 ** ((age_grid - 20) / 10)),
+                         0.6 * (1.10 ** ((age_grid - 20) / 10)))
+    
+    # Smoking multiplier: Smokers have 2.5-3x higher mortality
+    smoking_multiplier = np.where(is_smoker, 2.5 + (age_grid - 20) * 0.02, 1.0)  # Higher multiplier for older smokers
+    
+    # India-specific adjustment (higher mortality than developed countries)
+    india_multiplier = 1.15
+    
+    # Mortality improvement over time (1-2% annual reduction)
+    years_from_2014 = year_grid - 2014
+    improvement = 0.985 ** years_from_2014
+    
+    mortality_rate = base_rate * smoking_multiplier * india_multiplier * improvement
+    
+    # Life expectancy calculation (India-specific)
+    # Smokers have 8-12 years lower life expectancy
+    base_life_exp = np.maximum(np.where(is_male, 68, 70) - age_grid, 0) * 0.95
+    
+    # Smoking reduces life expectancy
+    life_expectancy_reduction = 10 - (age_grid - 20) * 0.1  # More impact at younger ages
+    base_life_exp = np.where(is_smoker, np.maximum(0, base_life_exp - life_expectancy_reduction), base_life_exp)
+    
+    # Improving over time
+    life_expectancy = base_life_exp + (years_from_2014 * 0.15)
+    
+    mortality_data = {
+        'year': year_grid,
+        'country': 'India',
+        'gender': gender_col,
+        'age': age_grid,
+        'smoking_status': smoking_col,
+        'mortality_rate': _round(mortality_rate, 4),
+        'life_expectancy': _round(np.maximum(life_expectancy, 0), 1)
+    }
 
     mortality_df = pd.DataFrame(mortality_data)
-    mortality_df.to_csv(os.path.join(data_dir, 'mortality_data.csv'), index=False)
+    _save(mortality_df, data_dir, 'mortality_data.csv')
     print(f"   Created mortality_data.csv with {len(mortality_df)} rows")
 
     # 2. Generate Economic Data (2014-2024) - India-specific
@@ -122,13 +159,11 @@ def generate_data(data_dir='data'):
         })
 
     economic_df = pd.DataFrame(economic_data)
-    economic_df.to_csv(os.path.join(data_dir, 'economic_data.csv'), index=False)
+    _save(economic_df, data_dir, 'economic_data.csv')
     print(f"   Created economic_data.csv with {len(economic_df)} rows")
 
     # 3. Generate Base Premiums (Premium per 1 Lakh Sum Insured)
     print("3. Generating base premiums (premium per 1 lakh sum insured)...")
-    premium_data = []
-    
     groups = ['Individual', 'Family', 'Corporate']
     policy_types = ['Term Life', 'Whole Life']
     
@@ -137,59 +172,51 @@ def generate_data(data_dir='data'):
     base_term_premium_rate = 50  # ₹50 per ₹1 lakh per year for Term Life (age 25, male, non-smoker)
     base_whole_premium_rate = 200  # ₹200 per ₹1 lakh per year for Whole Life (age 25, male, non-smoker)
     
-    for group in groups:
-        for gender in genders:
-            for age in ages:
-                for policy_type in policy_types:
-                    for smoking_status in smoking_statuses:
-                        # Age factor (exponential increase with age)
-                        # Premium increases significantly with age due to higher mortality risk
-                        age_factor = 1.08 ** ((age - 25) / 5)  # 8% increase per 5 years
-                        
-                        # Gender factor (males pay more due to higher mortality)
-                        gender_factor = 1.20 if gender == 'Male' else 1.0
-                        
-                        # Smoking factor: Smokers pay 2.5-3x more (industry standard)
-                        if smoking_status == 'Smoker':
-                            smoking_factor = 2.5 + (age - 20) * 0.015  # Higher multiplier for older smokers
-                        else:
-                            smoking_factor = 1.0
-                        
-                        # Group factor (volume discounts)
-                        group_factors = {
-                            'Individual': 1.0,
-                            'Family': 0.92,  # Family discount (8% off)
-                            'Corporate': 0.80  # Corporate volume discount (20% off)
-                        }
-                        group_factor = group_factors[group]
-                        
-                        # Policy type base rate
-                        if policy_type == 'Term Life':
-                            base_rate = base_term_premium_rate
-                        else:
-                            base_rate = base_whole_premium_rate
-                        
-                        # Calculate premium per ₹1 lakh sum insured
-                        premium_per_unit = base_rate * age_factor * gender_factor * smoking_factor * group_factor
-                        
-                        premium_data.append({
-                            'country': 'India',
-                            'group': group,
-                            'gender': gender,
-                            'age': age,
-                            'policy_type': policy_type,
-                            'smoking_status': smoking_status,
-                            'premium_per_unit': round(premium_per_unit, 2)  # Premium per ₹1 lakh
-                        })
+    # One row per (group, gender, age, policy type, smoking status) in that nesting order
+    grid = _cartesian(group=groups, gender=genders, age=ages, policy_type=policy_types,
+                      smoking_status=smoking_statuses)
+    group_col, gender_col, age_grid, policy_col, smoking_col = grid.values()
+    
+    # Age factor (exponential increase with age)
+    # Premium increases significantly with age due to higher mortality risk
+    age_factor = 1.08 ** ((age_grid - 25) / 5)  # 8% increase per 5 years
+    
+    # Gender factor (males pay more due to higher mortality)
+    gender_factor = np.where(gender_col == 'Male', 1.20, 1.0)
+    
+    # Smoking factor: Smokers pay 2.5-3x more (industry standard)
+    smoking_factor = np.where(smoking_col == 'Smoker', 2.5 + (age_grid - 20) * 0.015, 1.0)  # Higher multiplier for older smokers
+    
+    # Group factor (volume discounts)
+    group_factors = {
+        'Individual': 1.0,
+        'Family': 0.92,  # Family discount (8% off)
+        'Corporate': 0.80  # Corporate volume discount (20% off)
+    }
+    group_factor = np.array([group_factors[group] for group in group_col])
+    
+    # Policy type base rate
+    base_rate = np.where(policy_col == 'Term Life', base_term_premium_rate, base_whole_premium_rate)
+    
+    # Calculate premium per ₹1 lakh sum insured
+    premium_per_unit = base_rate * age_factor * gender_factor * smoking_factor * group_factor
+    
+    premium_data = {
+        'country': 'India',
+        'group': group_col,
+        'gender': gender_col,
+        'age': age_grid,
+        'policy_type': policy_col,
+        'smoking_status': smoking_col,
+        'premium_per_unit': _round(premium_per_unit, 2)  # Premium per ₹1 lakh
+    }
 
     premium_df = pd.DataFrame(premium_data)
-    premium_df.to_csv(os.path.join(data_dir, 'base_premiums.csv'), index=False)
+    _save(premium_df, data_dir, 'base_premiums.csv')
     print(f"   Created base_premiums.csv with {len(premium_df)} rows")
 
     # 4. Generate Demographic Distribution
     print("4. Generating demographic distribution...")
-    demographic_data = []
-    
     total_policies = 100000
     
     # India-specific distribution
@@ -236,55 +263,62 @@ def generate_data(data_dir='data'):
         20000000: 0.05   # 5% have 2Cr coverage
     }
     
+    # Policy counts split level by level (group, gender, age range, policy type), each
+    # share truncated to whole policies as it is applied; shape (3, 2, 6, 2)
+    group_policies = (total_policies * np.array([group_distribution[g] for g in groups])).astype(int)
+    gender_policies = (group_policies[:, None] * np.array([gender_distribution[g] for g in genders])).astype(int)
+    age_policies = (gender_policies[..., None] * np.array(list(age_distribution.values()))).astype(int)
+    policy_count = (age_policies[..., None] * np.array([policy_type_distribution[p] for p in policy_types])).astype(int)
+    
+    # Distribute across ages in the range
+    age_starts = np.array([age_range[0] for age_range in age_distribution])
+    ages_per_range = np.array([len(range(age_range[0], min(age_range[1] + 1, 81)))
+                               for age_range in age_distribution])
+    policies_per_age = np.maximum(1, policy_count // ages_per_range[:, None])
+    
+    # One row per (group, gender, age range, policy type) block, expanded into its
+    # (age, smoking status, sum insured) rows in the same nesting order
+    grid = _cartesian(group=groups, gender=genders, age_range=range(len(age_distribution)),
+                      policy_type=policy_types)
+    range_idx = grid['age_range']
+    rows_per_age = len(smoking_statuses) * len(sum_insured_options)
+    block_rows = ages_per_range[range_idx] * rows_per_age
+    block = np.repeat(np.arange(len(block_rows)), block_rows)
+    offset = np.arange(len(block)) - np.repeat(np.cumsum(block_rows) - block_rows, block_rows)
+    age_col = age_starts[range_idx[block]] + offset // rows_per_age
+    smoking_idx = offset // len(sum_insured_options) % len(smoking_statuses)
+    sum_insured_idx = offset % len(sum_insured_options)
+    
+    # Distribute between smokers and non-smokers, then across sum insured amounts
+    smoking_count = (policies_per_age.ravel()[block]
+                     * np.array([smoking_distribution[s] for s in smoking_statuses])[smoking_idx]).astype(int)
+    sum_insured_count = (smoking_count
+                         * np.array([sum_insured_distribution[si] for si in sum_insured_options])[sum_insured_idx]).astype(int)
+    
+    # Add some randomness (drawn in row order from the reseeded global stream, so the
+    # generated counts match the original row-by-row draws)
     np.random.seed(42)
-    for group in groups:
-        group_policies = int(total_policies * group_distribution[group])
-        
-        for gender in genders:
-            gender_policies = int(group_policies * gender_distribution[gender])
-            
-            for age_range, age_share in age_distribution.items():
-                age_policies = int(gender_policies * age_share)
-                
-                for policy_type in policy_types:
-                    policy_count = int(age_policies * policy_type_distribution[policy_type])
-                    
-                    # Distribute across ages in the range
-                    ages_in_range = list(range(age_range[0], min(age_range[1] + 1, 81)))
-                    if len(ages_in_range) > 0:
-                        policies_per_age = max(1, policy_count // len(ages_in_range))
-                        
-                        for age in ages_in_range:
-                            # Distribute between smokers and non-smokers
-                            for smoking_status in smoking_statuses:
-                                smoking_count = int(policies_per_age * smoking_distribution[smoking_status])
-                                
-                                # Distribute across sum insured amounts
-                                for sum_insured in sum_insured_options:
-                                    sum_insured_count = int(smoking_count * sum_insured_distribution[sum_insured])
-                                    
-                                    # Add some randomness
-                                    final_count = int(sum_insured_count * np.random.uniform(0.9, 1.1))
-                                    final_count = max(1, final_count)
-                                    
-                                    demographic_data.append({
-                                        'country': 'India',
-                                        'group': group,
-                                        'gender': gender,
-                                        'age': age,
-                                        'policy_type': policy_type,
-                                        'smoking_status': smoking_status,
-                                        'sum_insured': sum_insured,
-                                        'policy_count': final_count
-                                    })
+    final_count = (sum_insured_count * np.random.uniform(0.9, 1.1, size=len(block))).astype(int)
+    final_count = np.maximum(1, final_count)
+    
+    # Normalize to approximately total_policies (on the array, before the frame exists)
+    scale_factor = total_policies / final_count.sum()
+    final_count = (final_count * scale_factor).astype(int)
+    
+    demographic_data = {
+        'country': 'India',
+        'group': grid['group'][block],
+        'gender': grid['gender'][block],
+        'age': age_col,
+        'policy_type': grid['policy_type'][block],
+        'smoking_status': np.array(smoking_statuses)[smoking_idx],
+        'sum_insured': np.array(sum_insured_options)[sum_insured_idx],
+        'policy_count': final_count
+    }
 
     demographic_df = pd.DataFrame(demographic_data)
     
-    # Normalize to approximately total_policies
-    scale_factor = total_policies / demographic_df['policy_count'].sum()
-    demographic_df['policy_count'] = (demographic_df['policy_count'] * scale_factor).astype(int)
-    
-    demographic_df.to_csv(os.path.join(data_dir, 'demographic_distribution.csv'), index=False)
+    _save(demographic_df, data_dir, 'demographic_distribution.csv')
     print(f"   Created demographic_distribution.csv with {len(demographic_df)} rows")
     print(f"   Total policies: {demographic_df['policy_count'].sum()}")
     
@@ -1,13 +1,76 @@
 """
 Forecasting engine for life insurance premiums.
 """
+import threading
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from data_models import Gender, PolicyType
 
 
+def _filter_mask(df: pd.DataFrame, filters: Optional[Dict]) -> np.ndarray:
+    """Boolean mask of the rows of df passing the segment and age filters (filters on
+    columns df doesn't have are ignored)"""
+    mask = np.ones(len(df), dtype=bool)
+    if not filters:
+        return mask
+    for col in ('gender', 'policy_type', 'group', 'smoking_status'):
+        if col in filters and filters[col] and col in df.columns:
+            mask &= (df[col] == filters[col]).to_numpy()
+    if 'age_min' in filters:
+        mask &= df['age'].to_numpy() >= filters['age_min']
+    if 'age_max' in filters:
+        mask &= df['age'].to_numpy() <= filters['age_max']
+    return mask
+
+
+def _composite_key(df: pd.DataFrame, keys: List[str]) -> np.ndarray:
+    """
+    One int64 per row identifying its combination of key values: the leading integer
+    column, then the codes of the categorical columns after it, in mixed radix.
+    Comparable across frames whose categoricals share their categories.
+    """
+    key = df[keys[0]].to_numpy(dtype=np.int64)
+    for col in keys[1:]:
+        values = df[col]
+        key = key * (len(values.cat.categories) + 1) + (values.cat.codes.to_numpy(dtype=np.int64) + 1)
+    return key
+
+
+# Number of filtered base premium segments each forecaster keeps memoized
+_SEGMENT_CACHE_SIZE = 64
+
+# Number of (scenario, country, years) projection pairs each forecaster keeps memoized
+_PROJECTION_CACHE_SIZE = 64
+
+
+# Low-cardinality label columns shared by the input files
+LABEL_COLUMNS = ('country', 'gender', 'group', 'policy_type', 'smoking_status')
+
+
+def align_label_categories(*frames: pd.DataFrame) -> Tuple[pd.DataFrame, ...]:
+    """
+    Return the frames with their label columns as categoricals sharing one set of
+    (sorted) categories, so merges and filters compare integer codes.
+    Columns already aligned are left as they are; the input frames are not modified.
+    """
+    frames = list(frames)
+    for col in LABEL_COLUMNS:
+        present = [i for i, df in enumerate(frames) if col in df.columns]
+        if not present:
+            continue
+        dtypes = [frames[i][col].dtype for i in present]
+        if all(isinstance(dtype, pd.CategoricalDtype) and dtype == dtypes[0] for dtype in dtypes):
+            continue
+        categories = sorted(set().union(*(frames[i][col].unique() for i in present)))
+        dtype = pd.CategoricalDtype(categories)
+        for i in present:
+            frames[i] = frames[i].assign(**{col: frames[i][col].astype(dtype)})
+    return tuple(frames)
+
+
 @dataclass
 class Scenario:
     """Economic scenario definition"""
@@ -23,11 +86,32 @@ class PremiumForecaster:
     
     def __init__(self, mortality_df: pd.DataFrame, economic_df: pd.DataFrame, 
                  base_premium_df: pd.DataFrame, demographic_df: pd.DataFrame):
+        # Label columns as shared categoricals (a no-op for frames loaded by the app)
+        mortality_df, economic_df, base_premium_df, demographic_df = align_label_categories(
+            mortality_df, economic_df, base_premium_df, demographic_df)
         self.mortality_df = mortality_df
         self.economic_df = economic_df
         self.base_premium_df = base_premium_df
         self.demographic_df = demographic_df
         
+        # Latest historical year of the mortality and economic data and their rows,
+        # fixed for the forecaster's lifetime: looked up here once, not per forecast
+        self._mortality_countries = mortality_df['country'].unique()
+        self._mortality_max_year = mortality_df['year'].max()
+        self._base_mortality_rows = mortality_df[mortality_df['year'] == self._mortality_max_year]
+        self._economic_max_year = economic_df['year'].max()
+        self._base_economic_rows = economic_df[economic_df['year'] == self._economic_max_year]
+        # The first base-year economic row as a plain dict, for the scalar lookups of
+        # the premium adjustments (the base rates they are measured against)
+        self._base_economic_values = next(iter(self._base_economic_rows.to_dict('records')), {})
+        self._base_mortality_by_key = {}
+        self._country_rows_by_key = {}
+        self._projections_by_key = {}
+        self._segment_base_premiums_by_key = {}
+        # Guards the bounded projection and segment memos: compare_scenarios forecasts
+        # on a thread pool
+        self._memo_lock = threading.Lock()
+        
         # Standard scenarios (India-specific)
         self.scenarios = {
             'base': Scenario(
@@ -54,23 +138,23 @@ class PremiumForecaster:
         }
     
     def project_mortality(self, start_year: int, end_year: int, 
-                         scenario: Scenario, country: str = "India") -> pd.DataFrame:
-        """Project mortality rates into the future"""
+                         scenario: Scenario, country: str = "India",
+                         filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Project mortality rates into the future (for the rows passing filters, if given)"""
         # Check if mortality_df is empty
         if self.mortality_df.empty:
             raise ValueError("Mortality DataFrame is empty. Please check data initialization.")
         
         # Check available countries
-        available_countries = self.mortality_df['country'].unique()
+        available_countries = self._mortality_countries
         if country not in available_countries:
             raise ValueError(f"Country '{country}' not found in mortality data. Available countries: {list(available_countries)}")
         
         # Get latest historical data
-        latest_year = self.mortality_df['year'].max()
-        latest_data_filtered = self.mortality_df[
-            (self.mortality_df['year'] == latest_year) & 
-            (self.mortality_df['country'] == country)
-        ].copy()
+        latest_year = self._mortality_max_year
+        latest_data_filtered = self._base_mortality_rows[
+            self._base_mortality_rows['country'] == country
+        ]
         
         if latest_data_filtered.empty:
             # Fallback: use any data for the country
@@ -79,39 +163,39 @@ class PremiumForecaster:
                 raise ValueError(f"No mortality data available for country: {country}. Available countries: {list(available_countries)}")
             # Use most recent available data for the country
             latest_year_available = country_data['year'].max()
-            latest_data = country_data[country_data['year'] == latest_year_available].copy()
+            latest_data = country_data[country_data['year'] == latest_year_available]
             latest_year = latest_year_available
         else:
             latest_data = latest_data_filtered
+        if filters:
+            latest_data = latest_data[_filter_mask(latest_data, filters)]
+        
+        # All (year, row) projections at once: one row per latest-data row for each
+        # year, year-major, with the per-year factors broadcast over the rows
+        years = np.arange(start_year, end_year + 1)
+        years_ahead = (years - latest_year)[:, None]
+        n_rows = len(latest_data)
         
-        projections = []
-        
-        for year in range(start_year, end_year + 1):
-            years_ahead = year - latest_year
-            
-            for _, row in latest_data.iterrows():
-                # Apply mortality improvement (annual reduction in mortality rate)
-                improvement_factor = ((100 - scenario.mortality_improvement) / 100) ** years_ahead
-                projected_mortality = row['mortality_rate'] * improvement_factor
-                
-                # Update life expectancy (increases with mortality improvement)
-                life_expectancy_increase = years_ahead * (scenario.mortality_improvement / 100)
-                projected_life_expectancy = row['life_expectancy'] + life_expectancy_increase
-                
-                projection_record = {
-                    'year': year,
-                    'country': country,
-                    'gender': row['gender'],
-                    'age': row['age'],
-                    'mortality_rate': round(projected_mortality, 4),
-                    'life_expectancy': round(projected_life_expectancy, 2)
-                }
-                
-                # Include smoking_status if available
-                if 'smoking_status' in row:
-                    projection_record['smoking_status'] = row['smoking_status']
-                
-                projections.append(projection_record)
+        # Apply mortality improvement (annual reduction in mortality rate)
+        improvement_factor = ((100 - scenario.mortality_improvement) / 100) ** years_ahead
+        projected_mortality = latest_data['mortality_rate'].to_numpy(dtype=np.float64) * improvement_factor
+        
+        # Update life expectancy (increases with mortality improvement)
+        life_expectancy_increase = years_ahead * (scenario.mortality_improvement / 100)
+        projected_life_expectancy = latest_data['life_expectancy'].to_numpy(dtype=np.float64) + life_expectancy_increase
+        
+        projections = {
+            'year': np.repeat(years, n_rows),
+            'country': country,
+            'gender': np.tile(latest_data['gender'].to_numpy(dtype=object), len(years)),
+            'age': np.tile(latest_data['age'].to_numpy(dtype=np.int64), len(years)),
+            'mortality_rate': np.round(projected_mortality, 4).ravel(),
+            'life_expectancy': np.round(projected_life_expectancy, 2).ravel()
+        }
+        
+        # Include smoking_status if available
+        if 'smoking_status' in latest_data.columns:
+            projections['smoking_status'] = np.tile(latest_data['smoking_status'].to_numpy(dtype=object), len(years))
         
         return pd.DataFrame(projections)
     
@@ -119,10 +203,9 @@ class PremiumForecaster:
                          scenario: Scenario, country: str = "India") -> pd.DataFrame:
         """Project economic indicators into the future"""
         # Get latest historical data
-        latest_year = self.economic_df['year'].max()
-        latest_data_filtered = self.economic_df[
-            (self.economic_df['year'] == latest_year) & 
-            (self.economic_df['country'] == country)
+        latest_year = self._economic_max_year
+        latest_data_filtered = self._base_economic_rows[
+            self._base_economic_rows['country'] == country
         ]
         
         if latest_data_filtered.empty:
@@ -140,200 +223,314 @@ class PremiumForecaster:
         else:
             latest_data = latest_data_filtered.iloc[0]
         
-        projections = []
-        np.random.seed(42)
-        
-        for year in range(start_year, end_year + 1):
-            years_ahead = year - latest_year
-            
-            # Converge towards scenario targets with some volatility
-            convergence_factor = 1 - np.exp(-years_ahead / 5)  # Gradually converge
-            
-            inflation = (latest_data['inflation_rate'] * (1 - convergence_factor) + 
-                        scenario.inflation_base * convergence_factor)
-            inflation += np.random.normal(0, 0.3) * (1 - convergence_factor)
-            
-            interest = (latest_data['interest_rate'] * (1 - convergence_factor) + 
-                       scenario.interest_base * convergence_factor)
-            interest += np.random.normal(0, 0.3) * (1 - convergence_factor)
-            
-            # GDP growth tends to correlate with scenario
-            gdp = scenario.inflation_base * 0.8 + np.random.normal(0, 0.5)
-            
-            projections.append({
-                'year': year,
-                'country': country,
-                'inflation_rate': round(max(0.5, inflation), 2),
-                'interest_rate': round(max(0.5, interest), 2),
-                'gdp_growth': round(gdp, 2)
-            })
+        # Converge towards scenario targets with some volatility, for all years at once
+        years = np.arange(start_year, end_year + 1)
+        years_ahead = years - latest_year
+        convergence_factor = 1 - np.exp(-years_ahead / 5)  # Gradually converge
+        
+        # Noise for every year in one batch from a dedicated generator seeded like the
+        # former global np.random.seed(42), drawn in the same (year, indicator) order
+        # as the per-year calls, so the projected values are unchanged
+        noise = np.random.RandomState(42).standard_normal((len(years), 3)) * [0.3, 0.3, 0.5]
+        
+        inflation = (latest_data['inflation_rate'] * (1 - convergence_factor) + 
+                     scenario.inflation_base * convergence_factor)
+        inflation += noise[:, 0] * (1 - convergence_factor)
+        
+        interest = (latest_data['interest_rate'] * (1 - convergence_factor) + 
+                    scenario.interest_base * convergence_factor)
+        interest += noise[:, 1] * (1 - convergence_factor)
+        
+        # GDP growth tends to correlate with scenario
+        gdp = scenario.inflation_base * 0.8 + noise[:, 2]
+        
+        projections = {
+            'year': years,
+            'country': country,
+            'inflation_rate': np.round(np.maximum(0.5, inflation), 2),
+            'interest_rate': np.round(np.maximum(0.5, interest), 2),
+            'gdp_growth': np.round(gdp, 2)
+        }
         
         return pd.DataFrame(projections)
     
+    def _projections(self, scenario_name: str, country: str,
+                     start_year: int, end_year: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Mortality and economic projections of a scenario for country (memoized for the
+        most recent keys: they do not depend on the segment filters, and are only read by
+        the callers)"""
+        cache_key = (scenario_name, country, start_year, end_year)
+        with self._memo_lock:
+            projections = self._projections_by_key.get(cache_key)
+        if projections is not None:
+            return projections
+        
+        scenario = self.scenarios[scenario_name]
+        projections = (
+            self.project_mortality(start_year, end_year, scenario, country),
+            self.project_economics(start_year, end_year, scenario, country)
+        )
+        
+        with self._memo_lock:
+            if (cache_key not in self._projections_by_key
+                    and len(self._projections_by_key) >= _PROJECTION_CACHE_SIZE):
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._projections_by_key[next(iter(self._projections_by_key))]
+            self._projections_by_key[cache_key] = projections
+        return projections
+    
+    def _base_mortality(self, country: str, keys: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted composite keys of the first latest-year row per key in country, and
+        that row's mortality rate and life expectancy as the columns of an array (memoized)"""
+        cache_key = (country, keys)
+        if cache_key not in self._base_mortality_by_key:
+            rows = self._base_mortality_rows[self._base_mortality_rows['country'] == country]
+            rows = rows.drop_duplicates(list(keys))
+            row_keys = _composite_key(rows, list(keys))
+            order = np.argsort(row_keys)
+            values = rows[['mortality_rate', 'life_expectancy']].to_numpy(dtype=np.float64)
+            self._base_mortality_by_key[cache_key] = (row_keys[order], values[order])
+        return self._base_mortality_by_key[cache_key]
+    
+    def _country_rows(self, name: str, country: str) -> pd.DataFrame:
+        """Rows of the input frame self.<name> for country (memoized)"""
+        cache_key = (name, country)
+        if cache_key not in self._country_rows_by_key:
+            df = getattr(self, name)
+            self._country_rows_by_key[cache_key] = df[df['country'] == country]
+        return self._country_rows_by_key[cache_key]
+    
+    def _segment_base_premiums(self, country: str, filters: Optional[Dict]) -> pd.DataFrame:
+        """
+        Base premium rows of country passing the segment filters, with the base-year
+        mortality rate and life expectancy of each row (NaN where there is none) as
+        base_mortality_rate and base_life_expectancy.
+        
+        Memoized for the most recent segments: they do not depend on the scenario or
+        the years, so the scenarios of a comparison share one lookup.
+        """
+        cache_key = (country, tuple(sorted(filters.items())) if filters else ())
+        with self._memo_lock:
+            segment = self._segment_base_premiums_by_key.get(cache_key)
+        if segment is not None:
+            return segment
+        
+        country_premiums = self._country_rows('base_premium_df', country)
+        segment = country_premiums[_filter_mask(country_premiums, filters)]
+        
+        # Looked up by key in the latest year of the historical data: a binary search
+        # of the rows' composite keys in the sorted base-year keys
+        base_keys = ['age', 'gender']
+        if 'smoking_status' in segment.columns and 'smoking_status' in self.mortality_df.columns:
+            base_keys.append('smoking_status')
+        sorted_keys, base_values = self._base_mortality(country, tuple(base_keys))
+        base_lookup = np.full((len(segment), 2), np.nan)
+        if len(sorted_keys):
+            query = _composite_key(segment, base_keys)
+            position = np.minimum(np.searchsorted(sorted_keys, query), len(sorted_keys) - 1)
+            found = sorted_keys[position] == query
+            base_lookup[found] = base_values[position[found]]
+        segment = segment.assign(
+            base_mortality_rate=base_lookup[:, 0], base_life_expectancy=base_lookup[:, 1]
+        )
+        
+        with self._memo_lock:
+            if (cache_key not in self._segment_base_premiums_by_key
+                    and len(self._segment_base_premiums_by_key) >= _SEGMENT_CACHE_SIZE):
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._segment_base_premiums_by_key[next(iter(self._segment_base_premiums_by_key))]
+            self._segment_base_premiums_by_key[cache_key] = segment
+        return segment
+    
+    def cumulative_inflation(self, economic_proj_full: pd.DataFrame) -> pd.Series:
+        """Compound inflation from the base year up to each projected year, indexed by year
+        
+        Entry y is (1 + i_base) * ... * (1 + i_y) over the projected years from the
+        base year (the latest historical year) through y.
+        """
+        base_year = self._economic_max_year
+        economic_history = economic_proj_full[economic_proj_full['year'] >= base_year].sort_values('year')
+        growth = 1 + economic_history['inflation_rate'].to_numpy(dtype=np.float64) / 100
+        return pd.Series(np.cumprod(growth), index=economic_history['year'].to_numpy())
+    
     def calculate_premiums(self, year: int, mortality_proj: pd.DataFrame, 
                           economic_proj: pd.DataFrame, country: str = "India",
-                          economic_proj_full: pd.DataFrame = None) -> pd.DataFrame:
-        """Calculate premiums for a given year"""
+                          economic_proj_full: pd.DataFrame = None,
+                          cumulative_inflation_by_year: Optional[pd.Series] = None) -> pd.DataFrame:
+        """Calculate premiums for a given year
+        
+        cumulative_inflation_by_year is cumulative_inflation(economic_proj_full); pass
+        it in when calculating several years from the same projection.
+        """
+        return self._calculate_premiums(year, year, mortality_proj, economic_proj, country,
+                                        economic_proj_full, cumulative_inflation_by_year)
+    
+    def _calculate_premiums(self, start_year: int, end_year: int, mortality_proj: pd.DataFrame,
+                            economic_proj: pd.DataFrame, country: str = "India",
+                            economic_proj_full: pd.DataFrame = None,
+                            cumulative_inflation_by_year: Optional[pd.Series] = None,
+                            filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Premiums for every year from start_year to end_year in one pass
+        
+        Rows are year-major, in base premium order within each year, the same rows
+        calculate_premiums returns for each year in turn. With filters, only the
+        base premium rows passing them are priced.
+        """
         # Check if mortality_proj is empty or missing 'year' column
         if mortality_proj.empty or 'year' not in mortality_proj.columns:
-            raise ValueError(f"Invalid mortality projection data for year {year}")
-        
-        year_mortality = mortality_proj[mortality_proj['year'] == year]
-        year_economic_filtered = economic_proj[economic_proj['year'] == year]
-        
-        if year_economic_filtered.empty:
-            raise ValueError(f"No economic data available for year {year}")
-        
-        year_economic = year_economic_filtered.iloc[0]
-        
-        premiums = []
-        
-        # Filter base premiums by country
-        base_premiums_filtered = self.base_premium_df[
-            self.base_premium_df['country'] == country
-        ].copy()
-        
-        # Merge with base premiums
-        for _, base_row in base_premiums_filtered.iterrows():
-            # Get corresponding mortality data (match on age, gender, and smoking_status)
-            mortality_filter = (year_mortality['age'] == base_row['age']) & \
-                             (year_mortality['gender'] == base_row['gender'])
-            
-            # Include smoking_status if available in both dataframes
-            if 'smoking_status' in base_row and 'smoking_status' in year_mortality.columns:
-                mortality_filter = mortality_filter & (year_mortality['smoking_status'] == base_row['smoking_status'])
-            
-            mortality_row = year_mortality[mortality_filter]
-            
-            if mortality_row.empty:
-                continue
-            
-            mortality_row = mortality_row.iloc[0]
-            
-            # Get premium per unit (per ₹1 lakh sum insured)
-            # If premium_per_unit exists, use it; otherwise convert base_premium (legacy support)
-            if 'premium_per_unit' in base_row:
-                premium_per_unit = base_row['premium_per_unit']
-            elif 'base_premium' in base_row:
-                # Legacy: assume base_premium is for ₹10 lakh coverage (convert to per unit)
-                premium_per_unit = base_row['base_premium'] / 10.0
-            else:
-                continue  # Skip if neither column exists
-            
-            # Store premium_per_unit - actual premium will be calculated when we have sum_insured
-            premium = premium_per_unit  # This is premium per ₹1 lakh
-            
-            # Get base year economic data for cumulative inflation calculation
-            base_year = self.economic_df['year'].max()
-            base_year_economic = self.economic_df[
-                self.economic_df['year'] == base_year
-            ].iloc[0]
-            
-            # Calculate cumulative inflation from base year to current year
-            # This represents the compound effect of inflation over time
-            years_from_base = year - base_year
-            if years_from_base > 0 and economic_proj_full is not None:
-                # Get all economic data from base year to current year
-                economic_history = economic_proj_full[
-                    (economic_proj_full['year'] >= base_year) & 
-                    (economic_proj_full['year'] <= year)
-                ].sort_values('year')
-                
-                # Compound inflation: (1 + i1) * (1 + i2) * ... * (1 + in)
-                cumulative_inflation = 1.0
-                for _, econ_row in economic_history.iterrows():
-                    cumulative_inflation *= (1 + econ_row['inflation_rate'] / 100)
-            else:
-                cumulative_inflation = 1.0
-            
-            # Apply cumulative inflation to base premium
-            premium *= cumulative_inflation
-            
-            # Mortality adjustment: higher mortality → higher premium
-            # But mortality improvements reduce risk, so this is a smaller effect
-            base_mortality_filter = (self.mortality_df['year'] == self.mortality_df['year'].max()) & \
-                                   (self.mortality_df['age'] == base_row['age']) & \
-                                   (self.mortality_df['gender'] == base_row['gender']) & \
-                                   (self.mortality_df['country'] == country)
-            
-            # Include smoking_status if available
-            if 'smoking_status' in base_row and 'smoking_status' in self.mortality_df.columns:
-                base_mortality_filter = base_mortality_filter & \
-                                       (self.mortality_df['smoking_status'] == base_row['smoking_status'])
-            
-            base_mortality = self.mortality_df[base_mortality_filter]['mortality_rate'].values
-            
-            if len(base_mortality) > 0:
-                mortality_factor = mortality_row['mortality_rate'] / base_mortality[0]
-                # Mortality improvements reduce premiums slightly (0.3 factor, not 0.5)
-                # This accounts for improved longevity reducing annual risk
-                premium *= (1 + (mortality_factor - 1) * 0.3)
-            
-            # Longevity impact: People living longer → different effects by policy type
-            # Term Life: Longer life expectancy → lower annual risk → reduces premium
-            # Whole Life: Longer life expectancy → longer policy exposure → increases premium (net effect)
-            base_life_exp_filter = (self.mortality_df['year'] == self.mortality_df['year'].max()) & \
-                                  (self.mortality_df['age'] == base_row['age']) & \
-                                  (self.mortality_df['gender'] == base_row['gender']) & \
-                                  (self.mortality_df['country'] == country)
-            
-            # Include smoking_status if available
-            if 'smoking_status' in base_row and 'smoking_status' in self.mortality_df.columns:
-                base_life_exp_filter = base_life_exp_filter & \
-                                      (self.mortality_df['smoking_status'] == base_row['smoking_status'])
-            
-            base_life_expectancy = self.mortality_df[base_life_exp_filter]['life_expectancy'].values
-            
-            if len(base_life_expectancy) > 0:
-                life_expectancy_change = mortality_row['life_expectancy'] - base_life_expectancy[0]
-                if base_row['policy_type'] == 'Term Life':
-                    # Term Life: Longer life expectancy reduces annual mortality risk
-                    # Small positive effect: 1 year increase → ~0.5% premium decrease
-                    longevity_adj = -0.005 * life_expectancy_change
-                else:  # Whole Life
-                    # Whole Life: Longer life expectancy increases policy exposure duration
-                    # Net effect: 1 year increase → ~0.3% premium increase (longer exposure outweighs lower annual risk)
-                    longevity_adj = 0.003 * life_expectancy_change
-                premium *= (1 + longevity_adj)
-            
-            # Interest rate adjustment: higher rates reduce present value of future claims
-            # But this effect is smaller than inflation (typically 0.1-0.15 multiplier)
-            # Also, higher rates allow insurers to invest premiums more effectively
-            base_interest = base_year_economic['interest_rate']
-            interest_change = year_economic['interest_rate'] - base_interest
-            # Small adjustment: -0.12 means 1% interest increase → 0.12% premium decrease
-            interest_adj = -0.12 * (interest_change / 100)
-            premium *= (1 + interest_adj)
-            
-            # GDP growth adjustment: Higher GDP → economic stability → better mortality improvements
-            # Also correlates with overall economic health affecting insurance costs
-            # GDP growth above baseline can slightly reduce premiums (economic efficiency)
-            base_gdp = base_year_economic.get('gdp_growth', 6.0)
-            gdp_change = year_economic.get('gdp_growth', 6.0) - base_gdp
-            # Small adjustment: 1% GDP increase above baseline → ~0.05% premium decrease
-            gdp_adj = -0.05 * (gdp_change / 100)
-            premium *= (1 + gdp_adj)
-            
-            premium_record = {
-                'year': year,
-                'country': country,
-                'group': base_row.get('group', 'Individual'),  # Include group
-                'gender': base_row['gender'],
-                'age': base_row['age'],
-                'policy_type': base_row['policy_type'],
-                'premium_per_unit': round(premium, 2),  # Premium per ₹1 lakh sum insured
-                'mortality_rate': mortality_row['mortality_rate'],
-                'life_expectancy': mortality_row['life_expectancy'],
-                'inflation_rate': year_economic['inflation_rate'],
-                'interest_rate': year_economic['interest_rate'],
-                'gdp_growth': year_economic.get('gdp_growth', 6.0)
-            }
-            
-            # Include smoking_status if available
-            if 'smoking_status' in base_row:
-                premium_record['smoking_status'] = base_row['smoking_status']
-            
-            premiums.append(premium_record)
+            raise ValueError(f"Invalid mortality projection data for year {start_year}")
+        
+        years = np.arange(start_year, end_year + 1)
+        missing_years = years[~np.isin(years, economic_proj['year'].to_numpy())]
+        if len(missing_years) > 0:
+            raise ValueError(f"No economic data available for year {missing_years[0]}")
+        
+        # Each year's economic row (the first one for the year)
+        econ_cols = ['year', 'inflation_rate', 'interest_rate']
+        if 'gdp_growth' in economic_proj.columns:
+            econ_cols.append('gdp_growth')
+        year_economics = economic_proj[economic_proj['year'].isin(years)].drop_duplicates('year')[
+            econ_cols
+        ].set_index('year')
+        
+        # Base premiums of the segment, with their base-year mortality values
+        base_premiums_filtered = self._segment_base_premiums(country, filters)
+        
+        # Get premium per unit (per ₹1 lakh sum insured)
+        # If premium_per_unit exists, use it; otherwise convert base_premium (legacy support)
+        if 'premium_per_unit' in base_premiums_filtered.columns:
+            premium_col = 'premium_per_unit'
+        elif 'base_premium' in base_premiums_filtered.columns:
+            premium_col = 'base_premium'
+        else:
+            return pd.DataFrame()  # Neither column exists: no premiums
+        
+        # Merge with base premiums: each row takes the first matching mortality row of
+        # each year (match on age, gender, and smoking_status); rows without one are
+        # dropped. The stable sort by year turns the base-major merge year-major.
+        mortality_keys = ['age', 'gender']
+        if 'smoking_status' in base_premiums_filtered.columns and 'smoking_status' in mortality_proj.columns:
+            mortality_keys.append('smoking_status')
+        # Only the segment's rows: the filters on key columns drop whole keys, which could
+        # not match a filtered base premium row anyway
+        key_filters = {k: v for k, v in (filters or {}).items()
+                       if k in mortality_keys or k in ('age_min', 'age_max')}
+        year_mortality = mortality_proj[
+            mortality_proj['year'].isin(years).to_numpy() & _filter_mask(mortality_proj, key_filters)
+        ].drop_duplicates(
+            ['year'] + mortality_keys
+        )[['year'] + mortality_keys + ['mortality_rate', 'life_expectancy']]
+        rows = base_premiums_filtered.merge(
+            year_mortality,
+            on=mortality_keys,
+            how='inner'
+        ).sort_values('year', kind='stable', ignore_index=True)
+        
+        if rows.empty:
+            return pd.DataFrame()
+        
+        rows = rows.join(year_economics, on='year')
+        
+        row_years = rows['year'].to_numpy()
+        mortality_rate = rows['mortality_rate'].to_numpy(dtype=np.float64)
+        life_expectancy = rows['life_expectancy'].to_numpy(dtype=np.float64)
+        base_mortality = rows['base_mortality_rate'].to_numpy(dtype=np.float64)
+        base_life_expectancy = rows['base_life_expectancy'].to_numpy(dtype=np.float64)
+        
+        # Store premium_per_unit - actual premium will be calculated when we have sum_insured
+        # (a private copy: the adjustments below are applied to it in place, and each
+        # factor is built in one scratch array, in the same order of operations)
+        premium = rows[premium_col].to_numpy(dtype=np.float64, copy=True)  # This is premium per ₹1 lakh
+        if premium_col == 'base_premium':
+            # Legacy: assume base_premium is for ₹10 lakh coverage (convert to per unit)
+            premium /= 10.0
+        
+        # Get base year economic data for cumulative inflation calculation
+        base_year = self._economic_max_year
+        base_year_economic = self._base_economic_values
+        
+        # Calculate cumulative inflation from base year to each row's year
+        # This represents the compound effect of inflation over time
+        cumulative_inflation = np.ones(len(rows))
+        if economic_proj_full is not None:
+            # Compound inflation: (1 + i1) * (1 + i2) * ... * (1 + in), read off the
+            # running product at the last projected year up to the row's year
+            if cumulative_inflation_by_year is None:
+                cumulative_inflation_by_year = self.cumulative_inflation(economic_proj_full)
+            position = np.searchsorted(cumulative_inflation_by_year.index.to_numpy(), row_years,
+                                       side='right') - 1
+            compounded = (row_years > base_year) & (position >= 0)
+            cumulative_inflation[compounded] = cumulative_inflation_by_year.to_numpy()[position[compounded]]
+        
+        # Apply cumulative inflation to base premium
+        premium *= cumulative_inflation
+        
+        # Mortality adjustment: higher mortality → higher premium
+        # But mortality improvements reduce risk, so this is a smaller effect
+        # Mortality improvements reduce premiums slightly (0.3 factor, not 0.5)
+        # This accounts for improved longevity reducing annual risk
+        factor = np.divide(mortality_rate, base_mortality)
+        factor -= 1
+        factor *= 0.3
+        factor += 1
+        factor[np.isnan(base_mortality)] = 1.0
+        premium *= factor
+        
+        # Longevity impact: People living longer → different effects by policy type
+        # Term Life: Longer life expectancy reduces annual mortality risk
+        #   Small positive effect: 1 year increase → ~0.5% premium decrease
+        # Whole Life: Longer life expectancy increases policy exposure duration
+        #   Net effect: 1 year increase → ~0.3% premium increase (longer exposure outweighs lower annual risk)
+        # (policy_type is a categorical, so the Term Life test compares integer codes)
+        is_term = (rows['policy_type'] == PolicyType.TERM.value).to_numpy()
+        np.subtract(life_expectancy, base_life_expectancy, out=factor)
+        factor *= np.where(is_term, -0.005, 0.003)
+        factor += 1
+        factor[np.isnan(base_life_expectancy)] = 1.0
+        premium *= factor
+        
+        # Interest rate adjustment: higher rates reduce present value of future claims
+        # But this effect is smaller than inflation (typically 0.1-0.15 multiplier)
+        # Also, higher rates allow insurers to invest premiums more effectively
+        interest_rate = rows['interest_rate'].to_numpy(dtype=np.float64)
+        base_interest = base_year_economic['interest_rate']
+        np.subtract(interest_rate, base_interest, out=factor)
+        # Small adjustment: -0.12 means 1% interest increase → 0.12% premium decrease
+        factor /= 100
+        factor *= -0.12
+        factor += 1
+        premium *= factor
+        
+        # GDP growth adjustment: Higher GDP → economic stability → better mortality improvements
+        # Also correlates with overall economic health affecting insurance costs
+        # GDP growth above baseline can slightly reduce premiums (economic efficiency)
+        gdp_growth = rows['gdp_growth'].to_numpy(dtype=np.float64) if 'gdp_growth' in rows.columns else 6.0
+        base_gdp = base_year_economic.get('gdp_growth', 6.0)
+        np.subtract(gdp_growth, base_gdp, out=factor)
+        # Small adjustment: 1% GDP increase above baseline → ~0.05% premium decrease
+        factor /= 100
+        factor *= -0.05
+        factor += 1
+        premium *= factor
+        
+        premiums = {
+            'year': row_years,
+            'country': country,
+            'group': rows['group'].to_numpy(dtype=object) if 'group' in rows.columns else 'Individual',
+            'gender': rows['gender'].to_numpy(dtype=object),
+            'age': rows['age'].to_numpy(dtype=np.int64),
+            'policy_type': rows['policy_type'].to_numpy(dtype=object),
+            'premium_per_unit': np.round(premium, 2),  # Premium per ₹1 lakh sum insured
+            'mortality_rate': mortality_rate,
+            'life_expectancy': life_expectancy,
+            'inflation_rate': rows['inflation_rate'].to_numpy(dtype=np.float64),
+            'interest_rate': interest_rate,
+            'gdp_growth': gdp_growth
+        }
+        
+        # Include smoking_status if available
+        if 'smoking_status' in rows.columns:
+            premiums['smoking_status'] = rows['smoking_status'].to_numpy(dtype=object)
         
         return pd.DataFrame(premiums)
     
@@ -342,155 +539,155 @@ class PremiumForecaster:
                                  country: str = "India",
                                  filters: Optional[Dict] = None) -> pd.DataFrame:
         """Forecast average premiums over time"""
-        scenario = self.scenarios[scenario_name]
+        # Demographics of the segment first: when the filters leave no policies there
+        # is nothing to weight, so the projections and premiums are not computed at all
+        country_demographics = self._country_rows('demographic_df', country)
+        demo_filtered = country_demographics[_filter_mask(country_demographics, filters)]
+        # Only the filtered sum insured (premium_per_unit itself doesn't vary by it)
+        if filters and filters.get('sum_insured') and 'sum_insured' in demo_filtered.columns:
+            demo_filtered = demo_filtered[demo_filtered['sum_insured'] == filters['sum_insured']]
+        if demo_filtered.empty:
+            return pd.DataFrame()
         
         # Project mortality and economics
-        mortality_proj = self.project_mortality(start_year, end_year, scenario, country)
-        economic_proj = self.project_economics(start_year, end_year, scenario, country)
+        mortality_proj, economic_proj = self._projections(scenario_name, country, start_year, end_year)
         
-        # Calculate premiums for each year
+        # Calculate premiums for all years in one pass, for the filtered segments only
         # Pass full economic projection for cumulative inflation calculation
-        all_premiums = []
-        for year in range(start_year, end_year + 1):
-            year_premiums = self.calculate_premiums(year, mortality_proj, economic_proj, country, economic_proj)
-            all_premiums.append(year_premiums)
+        premiums_df = self._calculate_premiums(start_year, end_year, mortality_proj, economic_proj,
+                                               country, economic_proj, filters=filters)
+        if premiums_df.empty:
+            return pd.DataFrame()  # No premiums for the segment (e.g. an age range outside the data)
         
-        premiums_df = pd.concat(all_premiums, ignore_index=True)
+        # Calculate weighted average by demographic distribution
+        # Merge premiums with demographics (include group, smoking_status, and sum_insured)
+        merge_cols = ['country', 'gender', 'age', 'policy_type']
+        if 'group' in premiums_df.columns and 'group' in demo_filtered.columns:
+            merge_cols.append('group')
+        if 'smoking_status' in premiums_df.columns and 'smoking_status' in demo_filtered.columns:
+            merge_cols.append('smoking_status')
+        # Note: sum_insured is NOT in merge_cols because premium_per_unit doesn't vary by sum_insured
+        # We filter by sum_insured in demo_filtered above, so merged will only have the filtered sum_insured
         
-        # Apply filters if provided
-        if filters:
-            if 'gender' in filters and filters['gender']:
-                premiums_df = premiums_df[premiums_df['gender'] == filters['gender']]
-            if 'policy_type' in filters and filters['policy_type']:
-                premiums_df = premiums_df[premiums_df['policy_type'] == filters['policy_type']]
-            if 'group' in filters and filters['group']:
-                premiums_df = premiums_df[premiums_df['group'] == filters['group']]
-            if 'smoking_status' in filters and filters['smoking_status']:
-                premiums_df = premiums_df[premiums_df['smoking_status'] == filters['smoking_status']]
-            if 'age_min' in filters:
-                premiums_df = premiums_df[premiums_df['age'] >= filters['age_min']]
-            if 'age_max' in filters:
-                premiums_df = premiums_df[premiums_df['age'] <= filters['age_max']]
+        # One merge for all years: premiums_df is year-major, and the merge keeps its
+        # order, so each year's rows come out as a merge of that year alone would
+        merged_all = premiums_df.merge(
+            demo_filtered,
+            on=merge_cols,
+            how='inner'
+        )
+        has_premium_per_unit = 'premium_per_unit' in merged_all.columns
+        has_sum_insured = 'sum_insured' in merged_all.columns
+        has_life_expectancy = 'life_expectancy' in merged_all.columns
+        has_mortality_rate = 'mortality_rate' in merged_all.columns
         
-        # Calculate weighted average by demographic distribution
-        # Merge with demographic data
-        demo_filtered = self.demographic_df[
-            self.demographic_df['country'] == country
-        ].copy()
+        # Calculate actual premium: premium_per_unit × (sum_insured / 100000)
+        # Handle both premium_per_unit (new) and premium (legacy) columns
+        if has_premium_per_unit:
+            # New format: multiply by sum_insured
+            if has_sum_insured:
+                merged_all = merged_all.assign(
+                    premium=merged_all['premium_per_unit'] * (merged_all['sum_insured'] / 100000.0)
+                )
+            else:
+                # If no sum_insured, use default of ₹10 lakh
+                merged_all = merged_all.assign(premium=merged_all['premium_per_unit'] * 10.0)
         
-        if filters:
-            if 'gender' in filters and filters['gender']:
-                demo_filtered = demo_filtered[demo_filtered['gender'] == filters['gender']]
-            if 'policy_type' in filters and filters['policy_type']:
-                demo_filtered = demo_filtered[demo_filtered['policy_type'] == filters['policy_type']]
-            if 'group' in filters and filters['group']:
-                demo_filtered = demo_filtered[demo_filtered['group'] == filters['group']]
-            if 'smoking_status' in filters and filters['smoking_status']:
-                demo_filtered = demo_filtered[demo_filtered['smoking_status'] == filters['smoking_status']]
-            if 'age_min' in filters:
-                demo_filtered = demo_filtered[demo_filtered['age'] >= filters['age_min']]
-            if 'age_max' in filters:
-                demo_filtered = demo_filtered[demo_filtered['age'] <= filters['age_max']]
-        
-        # Aggregate by year
-        forecast_results = []
-        for year in range(start_year, end_year + 1):
-            year_premiums = premiums_df[premiums_df['year'] == year]
-            year_demo = demo_filtered.copy()
-            
-            # Merge premiums with demographics (include group, smoking_status, and sum_insured)
-            merge_cols = ['country', 'gender', 'age', 'policy_type']
-            if 'group' in year_premiums.columns and 'group' in year_demo.columns:
-                merge_cols.append('group')
-            if 'smoking_status' in year_premiums.columns and 'smoking_status' in year_demo.columns:
-                merge_cols.append('smoking_status')
-            # Note: sum_insured is NOT in merge_cols because premium_per_unit doesn't vary by sum_insured
-            # We filter by sum_insured in demo_filtered above, so merged will only have the filtered sum_insured
-            merged = year_premiums.merge(
-                year_demo,
-                on=merge_cols,
-                how='inner'
-            )
-            
-            # Additional filter: if sum_insured filter was applied, ensure we only have that sum_insured
-            if filters and 'sum_insured' in filters and filters['sum_insured']:
-                if 'sum_insured' in merged.columns:
-                    merged = merged[merged['sum_insured'] == filters['sum_insured']]
-            
-            if not merged.empty:
-                # Calculate actual premium: premium_per_unit × (sum_insured / 100000)
-                # Handle both premium_per_unit (new) and premium (legacy) columns
-                if 'premium_per_unit' in merged.columns:
-                    # New format: multiply by sum_insured
-                    if 'sum_insured' in merged.columns:
-                        merged['premium'] = merged['premium_per_unit'] * (merged['sum_insured'] / 100000.0)
-                    else:
-                        # If no sum_insured, use default of ₹10 lakh
-                        merged['premium'] = merged['premium_per_unit'] * 10.0
-                elif 'premium' not in merged.columns:
-                    # Fallback: create premium from premium_per_unit if it exists
-                    if 'premium_per_unit' in merged.columns:
-                        merged['premium'] = merged['premium_per_unit'] * 10.0  # Default ₹10 lakh
-                
-                # Weighted average premium (actual premium, not per unit)
-                total_premium = (merged['premium'] * merged['policy_count']).sum()
-                total_policies = merged['policy_count'].sum()
-                avg_premium = total_premium / total_policies if total_policies > 0 else 0
-                
-                # Also calculate average premium per unit for comparison
-                if 'premium_per_unit' in merged.columns:
-                    avg_premium_per_unit = (merged['premium_per_unit'] * merged['policy_count']).sum() / total_policies if total_policies > 0 else 0
-                else:
-                    avg_premium_per_unit = avg_premium / 10.0  # Assume ₹10 lakh if not available
-                
-                # Also get average economic indicators and longevity metrics
-                year_econ_filtered = economic_proj[economic_proj['year'] == year]
-                if year_econ_filtered.empty:
-                    continue  # Skip this year if no economic data
-                year_econ = year_econ_filtered.iloc[0]
-                
-                # Calculate average life expectancy and mortality rate for the year
-                avg_life_expectancy = merged['life_expectancy'].mean() if 'life_expectancy' in merged.columns else 0
-                avg_mortality_rate = merged['mortality_rate'].mean() if 'mortality_rate' in merged.columns else 0
-                
-                result_record = {
-                    'year': year,
-                    'scenario': scenario_name,
-                    'average_premium': round(avg_premium, 2),  # Total premium (weighted by sum_insured)
-                    'average_premium_per_unit': round(avg_premium_per_unit, 2),  # Premium per ₹1 lakh
-                    'total_policies': int(total_policies),
-                    'inflation_rate': year_econ['inflation_rate'],
-                    'interest_rate': year_econ['interest_rate'],
-                    'gdp_growth': year_econ.get('gdp_growth', 6.0),
-                    'average_life_expectancy': round(avg_life_expectancy, 1),
-                    'average_mortality_rate': round(avg_mortality_rate, 4)
-                }
-                
-                # Include average sum insured if available
-                if 'sum_insured' in merged.columns:
-                    result_record['average_sum_insured'] = round((merged['sum_insured'] * merged['policy_count']).sum() / total_policies, 0) if total_policies > 0 else 0
-                
-                forecast_results.append(result_record)
-        
-        return pd.DataFrame(forecast_results)
+        # Aggregate all years in one pass over the merged arrays. Each year's rows are
+        # contiguous (merged_all is year-major), and each is reduced with a plain NumPy
+        # sum over its block: a grouped pandas sum uses compensated summation, whose
+        # last-bit differences can flip the rounded averages shown in the dashboard
+        if merged_all.empty:
+            return pd.DataFrame()
+        years = merged_all['year'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        blocks = list(zip(starts, np.r_[starts[1:], len(years)]))
+        
+        def year_sums(values):
+            return np.array([values[start:stop].sum() for start, stop in blocks])
+        
+        def year_means(col):
+            values = merged_all[col].to_numpy(dtype=np.float64)
+            return np.array([values[start:stop].sum() / (stop - start) for start, stop in blocks])
+        
+        policy_count = merged_all['policy_count']
+        by_year = {'total_policies': year_sums(policy_count.to_numpy()),
+                   'weighted_premium': year_sums((merged_all['premium'] * policy_count).to_numpy())}
+        if has_premium_per_unit:
+            by_year['weighted_premium_per_unit'] = year_sums((merged_all['premium_per_unit'] * policy_count).to_numpy())
+        if has_sum_insured:
+            by_year['weighted_sum_insured'] = year_sums((merged_all['sum_insured'] * policy_count).to_numpy())
+        if has_life_expectancy:
+            by_year['average_life_expectancy'] = year_means('life_expectancy')
+        if has_mortality_rate:
+            by_year['average_mortality_rate'] = year_means('mortality_rate')
+        by_year = pd.DataFrame(by_year, index=pd.Index(years[starts], name='year'))
+        
+        # Each year's economic row (the first one for the year); years without one are skipped
+        economics_by_year = economic_proj.drop_duplicates('year').set_index('year')
+        by_year = by_year[by_year.index.isin(economics_by_year.index)]
+        if by_year.empty:
+            return pd.DataFrame()
+        year_econ = economics_by_year.loc[by_year.index]
+        
+        # Weighted averages, 0 for a year without policies
+        total_policies = by_year['total_policies'].to_numpy()
+        has_policies = total_policies > 0
+        policies = np.where(has_policies, total_policies, 1)
+        
+        def weighted_average(col):
+            return np.where(has_policies, by_year[col].to_numpy() / policies, 0)
+        
+        avg_premium = weighted_average('weighted_premium')  # Actual premium, not per unit
+        if has_premium_per_unit:
+            avg_premium_per_unit = weighted_average('weighted_premium_per_unit')
+        else:
+            avg_premium_per_unit = avg_premium / 10.0  # Assume ₹10 lakh if not available
+        
+        forecast_columns = {
+            'year': by_year.index.to_numpy(),
+            'scenario': scenario_name,
+            'average_premium': np.round(avg_premium, 2),  # Total premium (weighted by sum_insured)
+            'average_premium_per_unit': np.round(avg_premium_per_unit, 2),  # Premium per ₹1 lakh
+            'total_policies': total_policies,
+            'inflation_rate': year_econ['inflation_rate'].to_numpy(),
+            'interest_rate': year_econ['interest_rate'].to_numpy(),
+            'gdp_growth': year_econ['gdp_growth'].to_numpy() if 'gdp_growth' in year_econ.columns else 6.0,
+            'average_life_expectancy': np.round(by_year['average_life_expectancy'].to_numpy(), 1) if has_life_expectancy else 0.0,
+            'average_mortality_rate': np.round(by_year['average_mortality_rate'].to_numpy(), 4) if has_mortality_rate else 0.0
+        }
+        
+        # Include average sum insured if available
+        if has_sum_insured:
+            forecast_columns['average_sum_insured'] = np.round(weighted_average('weighted_sum_insured'), 0)
+        
+        forecast_df = pd.DataFrame(forecast_columns)
+        # Integer columns narrowed losslessly; the float columns stay float64, as they
+        # hold the rounded values shown as-is in the tables and metrics
+        return forecast_df.astype({'year': np.int16, 'total_policies': np.int32})
     
     def compare_scenarios(self, start_year: int, end_year: int,
                          country: str = "India",
                          filters: Optional[Dict] = None) -> pd.DataFrame:
-        """Compare premiums across different scenarios"""
-        all_results = []
+        """Compare premiums across different scenarios
         
-        for scenario_name in self.scenarios.keys():
+        The scenarios are forecast concurrently on a thread pool: they only read the
+        shared source frames, and the heavy pandas/NumPy work releases the GIL.
+        """
+        def forecast(scenario_name):
             try:
-                results = self.forecast_average_premium(
+                return self.forecast_average_premium(
                     start_year, end_year, scenario_name, country, filters
                 )
-                if not results.empty and 'scenario' in results.columns:
-                    all_results.append(results)
             except Exception as e:
                 # Log error but continue with other scenarios
                 print(f"Warning: Failed to forecast for scenario '{scenario_name}': {str(e)}")
-                continue
+                return None
+        
+        # map returns the results in scenario order
+        with ThreadPoolExecutor(max_workers=len(self.scenarios)) as executor:
+            all_results = [results for results in executor.map(forecast, self.scenarios.keys())
+                           if results is not None and not results.empty and 'scenario' in results.columns]
         
         if not all_results:
             # Return empty DataFrame with expected structure
@@ -498,4 +695,8 @@ class PremiumForecaster:
                                         'inflation_rate', 'interest_rate', 'gdp_growth',
                                         'average_life_expectancy', 'average_mortality_rate'])
         
-        return pd.concat(all_results, ignore_index=True)
+        comparison_df = pd.concat(all_results, ignore_index=True)
+        # Categorical scenario column: equality filters and groupbys compare int codes
+        comparison_df['scenario'] = pd.Categorical(comparison_df['scenario'],
+                                                   categories=list(self.scenarios.keys()))
+        return comparison_df
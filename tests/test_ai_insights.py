@@ -0,0 +1,88 @@
+"""
+Tests for the insight statistics and the prompts rendered from them.
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ai_insights import PremiumInsightsGenerator, _frame_key, _scenario_stats
+
+
+def _high_premium_comparison() -> pd.DataFrame:
+    """Comparison frame of a high-premium segment (Whole Life, ₹2 Cr, ages 70-80):
+    premiums beyond float32's ~7 significant digits of precision"""
+    years = np.arange(2024, 2035)
+    ends = {'base': 283289.08, 'optimistic': 263530.36, 'pessimistic': 301245.17}
+    frames = []
+    for scenario, end in ends.items():
+        premiums = np.linspace(179561.95, end, len(years)).round(2)
+        frames.append(pd.DataFrame({
+            'year': years,
+            'scenario': scenario,
+            'average_premium': premiums,
+            'total_policies': 1200,
+            'inflation_rate': np.linspace(5.21, 4.87, len(years)).round(2),
+            'interest_rate': np.linspace(6.43, 6.61, len(years)).round(2),
+            'gdp_growth': np.linspace(4.13, 4.52, len(years)).round(2),
+            'average_life_expectancy': 12.4,
+            'average_mortality_rate': 0.0412,
+            'average_sum_insured': 20000000.0,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class HighPremiumPromptTest(unittest.TestCase):
+    """Rendered prompts and metrics carry the forecast's float64 values unchanged"""
+
+    def setUp(self):
+        # The prompt builders use no LLM state, so no client is set up
+        self.generator = object.__new__(PremiumInsightsGenerator)
+        self.comparison_df = _high_premium_comparison()
+
+    def test_summary_prompt_matches_forecast_values(self):
+        forecast_df = self.comparison_df[self.comparison_df['scenario'] == 'base']
+        prompt = self.generator._prepare_forecast_summary(forecast_df, 'base')
+        start = forecast_df['average_premium'].iloc[0]
+        end = forecast_df['average_premium'].iloc[-1]
+        self.assertIn(f"Starting Premium: ₹{start:,.2f}\n", prompt)
+        self.assertIn(f"Ending Premium: ₹{end:,.2f}\n", prompt)
+        self.assertIn("Ending Premium: ₹283,289.08\n", prompt)
+
+    def test_comparison_prompt_and_metrics_match_forecast_values(self):
+        prompt, result = self.generator._prepare_scenario_comparison(self.comparison_df)
+        for scenario, rows in self.comparison_df.groupby('scenario', sort=False):
+            start = rows['average_premium'].iloc[0]
+            end = rows['average_premium'].iloc[-1]
+            details = result['scenarios'][scenario]
+            self.assertEqual(details['start_premium'], start)
+            self.assertEqual(details['end_premium'], end)
+            self.assertEqual(details['avg_inflation'], rows['inflation_rate'].mean())
+            self.assertIn(f"- Ending Premium: ₹{end:,.2f}", prompt)
+        self.assertIn("- Ending Premium: ₹263,530.36", prompt)
+        self.assertEqual(result['premium_range']['min'], 263530.36)
+        self.assertEqual(result['premium_range']['max'], 301245.17)
+
+
+class FrameKeyTest(unittest.TestCase):
+    """The statistics memo is keyed on the frame's content, row order included"""
+
+    def test_reordered_rows_miss_the_cache(self):
+        forecast_df = _high_premium_comparison()
+        forecast_df = forecast_df[forecast_df['scenario'] == 'base'].reset_index(drop=True)
+        reversed_df = forecast_df.iloc[::-1].reset_index(drop=True)
+        self.assertNotEqual(_frame_key(forecast_df), _frame_key(reversed_df))
+
+        stats = _scenario_stats(forecast_df)
+        reversed_stats = _scenario_stats(reversed_df)
+        self.assertEqual(stats.loc['base', 'start'], forecast_df['average_premium'].iloc[0])
+        self.assertEqual(reversed_stats.loc['base', 'start'], reversed_df['average_premium'].iloc[0])
+        self.assertEqual(reversed_stats.loc['base', 'end'], reversed_df['average_premium'].iloc[-1])
+
+    def test_equal_content_shares_the_key(self):
+        forecast_df = _high_premium_comparison()
+        self.assertEqual(_frame_key(forecast_df), _frame_key(forecast_df.copy()))
+
+
+if __name__ == '__main__':
+    unittest.main()